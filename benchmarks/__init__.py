@@ -0,0 +1 @@
+"""Benchmarks for the bundled drivers, see bench_drivers.py."""
@@ -0,0 +1,226 @@
+"""End-to-end poll benchmark for the bundled drivers against simulated slaves.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.bench_drivers --transport tcp --rtt 20 --jitter 5 --save benchmarks/baseline.json
+    python -m benchmarks.bench_drivers --transport rtu --baud 9600 --compare benchmarks/baseline.json
+
+Each driver is polled through ModbusDevice.readData with the group selection of the
+coordinator's poll scheduler, and readConfig / readValue / writeValue are timed on its configuration
+and writable datapoints. Reported per driver: polls per second, p50/p99 cycle latency,
+p50/p99 latency per group and Modbus transactions per cycle.
+
+The device layer is measured without a running Home Assistant, so what ModbusCoordinator adds on top
+(change detection, notifying entities, device registry updates) is not included.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from custom_components.modbus_tcpip.devices.connection import TCPConnectionParams, RTUConnectionParams
+from custom_components.modbus_tcpip.devices.datatypes import ModbusDefaultGroups, ModbusMode, ModbusNumberData
+from custom_components.modbus_tcpip.devices.helpers import load_device_class
+from custom_components.modbus_tcpip.pollscheduler import ModbusPollScheduler
+
+from .simulator import SimulatedTcpSlave, SimulatedRtuSlave, build_register_image
+
+_LOGGER = logging.getLogger(__name__)
+
+DRIVERS = ["Trox.TVE", "Swegon.CASA_R4", "Swegon.CASA_R15", "Renke.RS-WS-N01-8"]
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+def summarize(samples: list[float]) -> dict:
+    """Latencies in milliseconds."""
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+def group_name(device, group) -> str:
+    if isinstance(group, ModbusDefaultGroups):
+        return group.name
+    for name in dir(type(device)):
+        if getattr(type(device), name, None) is group:
+            return name
+    return group.unique_id
+
+class Probe:
+    """Counts transactions on a device's connection and times reads per group, until detached."""
+
+    def __init__(self, device):
+        self.transactions = 0
+        self.group_latency = {}
+        self._device = device
+
+        connection = device._connection
+        execute = connection.execute
+
+        async def counted_execute(*args, **kwargs):
+            self.transactions += 1
+            return await execute(*args, **kwargs)
+        connection.execute = counted_execute
+
+        read_block = device._readBlock
+
+        async def timed_read_block(block, *args):
+            start = time.perf_counter()
+            await read_block(block, *args)
+            elapsed = time.perf_counter() - start
+            for group in {point[1] for point in block.points}:
+                self.group_latency.setdefault(group_name(device, group), []).append(elapsed)
+        device._readBlock = timed_read_block
+
+    def detach(self):
+        """Stop counting and timing, the instance attributes shadowed the original methods."""
+        del self._device._connection.execute
+        del self._device._readBlock
+
+async def bench_driver(driver: str, args) -> dict:
+    device_class = await load_device_class(driver)
+    if device_class is None:
+        raise RuntimeError(f"Driver {driver} could not be loaded")
+
+    # Register image from a throwaway instance of the driver
+    template = device_class(TCPConnectionParams("127.0.0.1", 0))
+    images = build_register_image(template)
+    template.close()
+
+    if args.transport == "tcp":
+        slave = SimulatedTcpSlave(images, rtt=args.rtt / 1000, jitter=args.jitter / 1000)
+        await slave.start()
+        params = TCPConnectionParams("127.0.0.1", slave.port, 1, args.max_inflight)
+    else:
+        slave = SimulatedRtuSlave(images, baud_rate=args.baud, rtt=args.rtt / 1000, jitter=args.jitter / 1000)
+        await slave.start()
+        params = RTUConnectionParams(slave.port, args.baud, 1)
+
+    device = device_class(params)
+    try:
+        probe = Probe(device)
+
+        # First read covers POLL_ONCE groups as well, keep it out of the steady state numbers
+        start = time.perf_counter()
+        await device.readData()
+        first_read = time.perf_counter() - start
+
+        scheduler = ModbusPollScheduler(device.getPollGroups(firstRead=False), default_interval=1)
+        probe.transactions = 0
+        probe.group_latency.clear()
+
+        cycles = []
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            await device.readData(scheduler.groups)
+            cycles.append(time.perf_counter() - start)
+        transactions_per_cycle = probe.transactions / max(len(cycles), 1)
+
+        # Group latencies cover the poll cycles only, not the config and single value reads below
+        probe.detach()
+
+        # Config group read, cold and then served from the cache, as used by the config selector
+        config_latency = []
+        for _ in range(2):
+            start = time.perf_counter()
+            await device.readConfig()
+            config_latency.append(time.perf_counter() - start)
+
+        # Single value reads
+        read_latency = []
+        for key in list(device.Datapoints[ModbusDefaultGroups.CONFIG])[:args.samples]:
+            start = time.perf_counter()
+            await device.readValue(ModbusDefaultGroups.CONFIG, key)
+            read_latency.append(time.perf_counter() - start)
+
+        # Writes of the current value to writable datapoints
+        write_latency = []
+        writable = [(group, key) for group, datapoints in device.Datapoints.items() if group.mode == ModbusMode.HOLDING
+                    for key, datapoint in datapoints.items() if isinstance(datapoint.DataType, ModbusNumberData)]
+        for group, key in writable[:args.samples]:
+            start = time.perf_counter()
+            await device.writeValue(group, key, device.Datapoints[group][key].Value)
+            write_latency.append(time.perf_counter() - start)
+
+        total = sum(cycles)
+        return {
+            "first_read_ms": round(first_read * 1000, 2),
+            "polls_per_sec": round(len(cycles) / total, 2) if total else 0.0,
+            "cycle": summarize(cycles),
+            "transactions_per_cycle": round(transactions_per_cycle, 2),
+            "groups": {name: summarize(samples) for name, samples in sorted(probe.group_latency.items())},
+            "read_config_ms": {"cold": round(config_latency[0] * 1000, 2), "cached": round(config_latency[1] * 1000, 2)},
+            "read_value": summarize(read_latency),
+            "write_value": summarize(write_latency),
+        }
+    finally:
+        device.close()
+        await slave.stop()
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def print_comparison(results: dict, baseline: dict):
+    current, previous = flatten(results), flatten(baseline)
+    print(f"{'metric':60} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, value in current.items():
+        if key not in previous:
+            continue
+        old = previous[key]
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:60} {old:>10} {value:>10} {change:>8}")
+
+async def main(args):
+    results = {
+        "settings": {"transport": args.transport, "rtt_ms": args.rtt, "jitter_ms": args.jitter,
+                     "baud": args.baud, "max_inflight": args.max_inflight, "cycles": args.cycles},
+        "drivers": {},
+    }
+    for driver in args.drivers:
+        _LOGGER.info("Benchmarking %s", driver)
+        results["drivers"][driver] = await bench_driver(driver, args)
+
+    print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("settings") != results["settings"]:
+            print("Warning: baseline was recorded with different settings", baseline.get("settings"))
+        print_comparison(results["drivers"], baseline.get("drivers", {}))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["tcp", "rtu"], default="tcp")
+    parser.add_argument("--drivers", nargs="+", default=DRIVERS)
+    parser.add_argument("--cycles", type=int, default=50, help="Poll cycles per driver")
+    parser.add_argument("--samples", type=int, default=10, help="readValue / writeValue calls per driver")
+    parser.add_argument("--rtt", type=float, default=0.0, help="Injected round trip time in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Injected jitter in ms (+/-)")
+    parser.add_argument("--baud", type=int, default=9600, help="Simulated baud rate (rtu)")
+    parser.add_argument("--max-inflight", type=int, default=1, help="Overlapping requests (tcp)")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a JSON file written by --save")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    logging.basicConfig(level=logging.DEBUG if arguments.verbose else logging.INFO)
+    asyncio.run(main(arguments))
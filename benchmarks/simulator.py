@@ -0,0 +1,200 @@
+"""Simulated Modbus slaves for the driver benchmarks.
+
+A pymodbus server preloaded with a register image built from a driver's datapoints, reachable
+over TCP through a proxy that adds round trip time and jitter, or over RTU through a pair of
+pseudo terminals bridged with the same delays plus the transmission time for the baud rate.
+"""
+import asyncio
+import logging
+import os
+import pty
+import random
+import socket
+import termios
+import tty
+
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusSlaveContext, ModbusServerContext
+from pymodbus.framer import ModbusRtuFramer
+from pymodbus.server import ModbusTcpServer, ModbusSerialServer
+
+from custom_components.modbus_tcpip.devices.codec import encode_value
+from custom_components.modbus_tcpip.devices.datatypes import ModbusMode, ModbusValueType
+
+_LOGGER = logging.getLogger(__name__)
+
+# Registers beyond the highest datapoint, so planned reads across holes always succeed
+IMAGE_MARGIN: int = 256
+
+def build_register_image(device) -> dict:
+    """Plausible register values for every datapoint of a driver, per register type."""
+    images = {ModbusMode.HOLDING: {}, ModbusMode.INPUT: {}}
+    for group, datapoints in device.Datapoints.items():
+        if group.mode not in images:
+            continue
+        for key, datapoint in datapoints.items():
+            value_type = datapoint.ValueType
+            if value_type in (ModbusValueType.STRING, ModbusValueType.STRING_UTF16):
+                value = key.upper()
+            elif value_type in (ModbusValueType.FLOAT32, ModbusValueType.FLOAT64):
+                value = 21.5
+            else:
+                value = 215
+            registers = encode_value(value, value_type, datapoint.Length, datapoint.WordOrder, datapoint.ByteOrder)
+            for i, register in enumerate(registers):
+                images[group.mode][datapoint.Address + i] = register
+    return images
+
+def build_context(images: dict) -> ModbusServerContext:
+    def block(image):
+        size = max(image, default=0) + IMAGE_MARGIN
+        values = [image.get(address, 0) for address in range(size)]
+        return ModbusSequentialDataBlock(0, values)
+
+    slave = ModbusSlaveContext(hr=block(images[ModbusMode.HOLDING]), ir=block(images[ModbusMode.INPUT]), zero_mode=True)
+    return ModbusServerContext(slaves=slave, single=True)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class LinkDelay:
+    """One way delay of a simulated link: half the RTT, jitter and the time on the wire."""
+
+    def __init__(self, rtt: float = 0.0, jitter: float = 0.0, baud_rate: int | None = None):
+        self.rtt = rtt
+        self.jitter = jitter
+        self.baud_rate = baud_rate
+        self._last_due = 0.0
+
+    def due(self, now: float, size: int) -> float:
+        delay = self.rtt / 2 + random.uniform(-self.jitter, self.jitter) / 2
+        if self.baud_rate:
+            delay += size * 11 / self.baud_rate
+        # Keep the byte stream in order
+        self._last_due = max(now + max(delay, 0.0), self._last_due)
+        return self._last_due
+
+class DelayedPipe:
+    """Forwards chunks to write() once their delay has passed."""
+
+    def __init__(self, write, delay: LinkDelay):
+        self._write = write
+        self._delay = delay
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._deliver())
+
+    def feed(self, data: bytes):
+        loop = asyncio.get_running_loop()
+        self._queue.put_nowait((self._delay.due(loop.time(), len(data)), data))
+
+    async def _deliver(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due, data = await self._queue.get()
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._write(data)
+
+    def close(self):
+        self._task.cancel()
+
+class SimulatedTcpSlave:
+    """pymodbus TCP server behind a proxy adding latency. Clients connect to self.port."""
+
+    def __init__(self, images: dict, rtt: float = 0.0, jitter: float = 0.0):
+        self._context = build_context(images)
+        self._rtt = rtt
+        self._jitter = jitter
+        self._server_port = free_port()
+        self._server = None
+        self._server_task = None
+        self._proxy = None
+        self._pipes = []
+        self.port = None
+
+    async def start(self):
+        self._server = ModbusTcpServer(self._context, address=("127.0.0.1", self._server_port))
+        self._server_task = asyncio.create_task(self._server.serve_forever())
+        await asyncio.sleep(0.1)
+
+        self._proxy = await asyncio.start_server(self._handle_client, "127.0.0.1", 0)
+        self.port = self._proxy.sockets[0].getsockname()[1]
+
+    async def _handle_client(self, reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self._server_port)
+        to_server = DelayedPipe(upstream_writer.write, LinkDelay(self._rtt, self._jitter))
+        to_client = DelayedPipe(writer.write, LinkDelay(self._rtt, self._jitter))
+        self._pipes += [to_server, to_client]
+
+        async def pump(source, pipe):
+            while data := await source.read(65536):
+                pipe.feed(data)
+
+        try:
+            await asyncio.gather(pump(reader, to_server), pump(upstream_reader, to_client))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            upstream_writer.close()
+
+    async def stop(self):
+        for pipe in self._pipes:
+            pipe.close()
+        if self._proxy is not None:
+            self._proxy.close()
+        if self._server is not None:
+            await self._server.shutdown()
+        if self._server_task is not None:
+            self._server_task.cancel()
+
+def _open_raw_pty():
+    master, slave = pty.openpty()
+    tty.setraw(master, termios.TCSANOW)
+    tty.setraw(slave, termios.TCSANOW)
+    return master, slave, os.ttyname(slave)
+
+class SimulatedRtuSlave:
+    """pymodbus RTU server on one pseudo terminal, bridged to another that clients open (self.port)."""
+
+    def __init__(self, images: dict, baud_rate: int = 9600, rtt: float = 0.0, jitter: float = 0.0):
+        self._context = build_context(images)
+        self._baud_rate = baud_rate
+        self._rtt = rtt
+        self._jitter = jitter
+        self._server = None
+        self._server_task = None
+        self._fds = []
+        self._pipes = []
+        self.port = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        client_master, client_slave, self.port = _open_raw_pty()
+        server_master, server_slave, server_port = _open_raw_pty()
+        self._fds = [client_master, client_slave, server_master, server_slave]
+
+        to_server = DelayedPipe(lambda data: os.write(server_master, data), LinkDelay(self._rtt, self._jitter, self._baud_rate))
+        to_client = DelayedPipe(lambda data: os.write(client_master, data), LinkDelay(self._rtt, self._jitter, self._baud_rate))
+        self._pipes = [to_server, to_client]
+        loop.add_reader(client_master, lambda: to_server.feed(os.read(client_master, 4096)))
+        loop.add_reader(server_master, lambda: to_client.feed(os.read(server_master, 4096)))
+
+        self._server = ModbusSerialServer(self._context, framer=ModbusRtuFramer, port=server_port, baudrate=self._baud_rate)
+        self._server_task = asyncio.create_task(self._server.serve_forever())
+        await asyncio.sleep(0.1)
+
+    async def stop(self):
+        loop = asyncio.get_running_loop()
+        for pipe in self._pipes:
+            pipe.close()
+        if self._server is not None:
+            await self._server.shutdown()
+        if self._server_task is not None:
+            self._server_task.cancel()
+        for fd in self._fds[0::2]:
+            loop.remove_reader(fd)
+        for fd in self._fds:
+            os.close(fd)
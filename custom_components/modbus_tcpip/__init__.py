@@ -1,17 +1,26 @@
 """Support for Modbus TCP/IP devices."""
+import asyncio
 import logging
+import struct
+
+import voluptuous as vol
 
 from functools import partial
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
 
 from homeassistant.const import CONF_DEVICES
 from .const import (
     DOMAIN,
+    DEVICE_INDEX,
     PLATFORMS,
+    STORAGE_VERSION,
     CONF_DEVICE_MODE,
     CONF_NAME,
     CONF_DEVICE_MODEL,
@@ -21,15 +30,72 @@ from .const import (
     CONF_SERIAL_BAUD,
     CONF_SLAVE_ID,
     CONF_SCAN_INTERVAL,
-    CONF_SCAN_INTERVAL_FAST
+    CONF_SCAN_INTERVAL_FAST,
+    CONF_MAX_INFLIGHT,
+    CONF_FAST_POLL_AFTER_WRITE,
+    DEFAULT_MAX_INFLIGHT,
+    DEFAULT_FAST_POLL_AFTER_WRITE
 )
 
 from .const import DeviceMode
 from .coordinator import ModbusCoordinator
 from .devices.connection import TCPConnectionParams, RTUConnectionParams
+from .devices.codec import decode_values, encode_values
+from .devices.datatypes import ModbusValueType, ModbusEndian
+from .devices.modbusdevice import RAW_READ_METHODS, RAW_WRITE_METHODS, MAX_READ_BITS
+
+from pymodbus.exceptions import ModbusException
 
 _LOGGER = logging.getLogger(__name__)
 
+REQUEST_UPDATE_SCHEMA = vol.All(vol.Schema({
+    vol.Optional("device_id"): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional("entity_id"): cv.entity_ids,
+    vol.Optional("group"): vol.All(cv.ensure_list, [cv.string]),
+}), cv.has_at_least_one_key("device_id", "entity_id"))
+
+_VALUE_FORMAT_SCHEMA = {
+    vol.Optional("value_type"): vol.In([value_type.value for value_type in ModbusValueType]),
+    vol.Optional("word_order", default=ModbusEndian.BIG.value): vol.In([endian.value for endian in ModbusEndian]),
+    vol.Optional("byte_order", default=ModbusEndian.BIG.value): vol.In([endian.value for endian in ModbusEndian]),
+}
+
+READ_REGISTERS_SCHEMA = vol.Schema({
+    vol.Required("device_id"): cv.string,
+    vol.Optional("register_type", default="holding"): vol.In(list(RAW_READ_METHODS)),
+    vol.Required("address"): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+    vol.Optional("count", default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_READ_BITS)),
+    **_VALUE_FORMAT_SCHEMA,
+})
+
+_COIL_VALUES = vol.Schema([cv.boolean])
+_REGISTER_VALUES = vol.Schema([vol.All(vol.Coerce(int), vol.Range(min=0, max=65535))])
+
+# Values per value_type, numbers often arrive as strings from text fields. Integer ranges are checked when encoding.
+_TYPED_VALUES = {
+    ModbusValueType.FLOAT32: vol.Schema([vol.Coerce(float)]),
+    ModbusValueType.FLOAT64: vol.Schema([vol.Coerce(float)]),
+    ModbusValueType.STRING: vol.Schema([cv.string]),
+    ModbusValueType.STRING_UTF16: vol.Schema([cv.string]),
+}
+_INTEGER_VALUES = vol.Schema([vol.Coerce(int)])
+
+def _validate_write_values(data: dict) -> dict:
+    """Coils take booleans, registers take 16 bit values unless a value_type encodes them."""
+    if data["register_type"] == "coil":
+        return {**data, "values": _COIL_VALUES(data["values"])}
+    if "value_type" not in data:
+        return {**data, "values": _REGISTER_VALUES(data["values"])}
+    return {**data, "values": _TYPED_VALUES.get(ModbusValueType(data["value_type"]), _INTEGER_VALUES)(data["values"])}
+
+WRITE_REGISTERS_SCHEMA = vol.All(vol.Schema({
+    vol.Required("device_id"): cv.string,
+    vol.Optional("register_type", default="holding"): vol.In(list(RAW_WRITE_METHODS)),
+    vol.Required("address"): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+    vol.Required("values"): vol.All(cv.ensure_list, vol.Length(min=1)),
+    **_VALUE_FORMAT_SCHEMA,
+}), _validate_write_values)
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Set up platform from a ConfigEntry."""
     _LOGGER.debug("Setting up configuration for Modbus TCP/IP!")
@@ -55,16 +121,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     device_model = entry.data.get(CONF_DEVICE_MODEL, None)
     scan_interval = entry.data[CONF_SCAN_INTERVAL]
     scan_interval_fast = entry.data[CONF_SCAN_INTERVAL_FAST]
+    fast_poll_after_write = entry.data.get(CONF_FAST_POLL_AFTER_WRITE, DEFAULT_FAST_POLL_AFTER_WRITE)
 
     if device_mode == DeviceMode.TCPIP:
         ip = entry.data[CONF_IP]
         port = entry.data[CONF_PORT]
         slave_id = entry.data[CONF_SLAVE_ID]
-        connection_params = TCPConnectionParams(ip, port, slave_id)
+        max_inflight = entry.data.get(CONF_MAX_INFLIGHT, DEFAULT_MAX_INFLIGHT)
+        connection_params = TCPConnectionParams(ip, port, slave_id, max_inflight)
     elif device_mode == DeviceMode.RTU:
         serial_port = entry.data[CONF_SERIAL_PORT]
         baudrate = entry.data[CONF_SERIAL_BAUD]
-        connection_params = RTUConnectionParams(serial_port, baudrate) 
+        slave_id = entry.data[CONF_SLAVE_ID]
+        connection_params = RTUConnectionParams(serial_port, baudrate, slave_id)
     else:
         _LOGGER.error(f"Unsupported device mode: {device_mode}")
         return False    
@@ -80,13 +149,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         name=name
     )
 
-    # Set up coordinator
-    coordinator = ModbusCoordinator(hass, dev, device_model, connection_params, scan_interval, scan_interval_fast)
+    # Lowest position not taken by the other devices on the same gateway / serial port, stable across reloads
+    used = {other.endpoint_index for other in hass.data[DOMAIN].values() if other.connection_params.key == connection_params.key}
+    endpoint_index = next(index for index in range(len(used) + 1) if index not in used)
+
+    # Set up coordinator, with storage for values that are only read once
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+    coordinator = ModbusCoordinator(hass, dev, device_model, connection_params, scan_interval, scan_interval_fast, fast_poll_after_write, store, endpoint_index)
     hass.data[DOMAIN][entry.entry_id] = coordinator
-    
+    hass.data.setdefault(DEVICE_INDEX, {})[dev.id] = coordinator
+
     # Might throw ConfigEntryNotReady, which should cause retry later
     # Or ConfigEntryError, which will cause integration to halt permanently.
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        # Release the shared connection, a retry will create a new coordinator
+        hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DEVICE_INDEX].pop(dev.id, None)
+        await coordinator.async_shutdown()
+        raise
 
     # Forward the setup to the platforms.
     hass.async_create_task(
@@ -97,32 +179,104 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
     # Register services
-    hass.services.async_register(DOMAIN, "request_update",partial(service_request_update, hass))
+    hass.services.async_register(DOMAIN, "request_update", partial(service_request_update, hass),
+                                 schema=REQUEST_UPDATE_SCHEMA)
+    hass.services.async_register(DOMAIN, "read_registers", partial(service_read_registers, hass),
+                                 schema=READ_REGISTERS_SCHEMA, supports_response=SupportsResponse.ONLY)
+    hass.services.async_register(DOMAIN, "write_registers", partial(service_write_registers, hass),
+                                 schema=WRITE_REGISTERS_SCHEMA)
     
     return True
 
 # Service-call to update values
 async def service_request_update(hass, call: ServiceCall):
-    """Handle the service call to update entities for a specific device."""
-    device_id = call.data.get("device_id")
-    if not device_id:
-        _LOGGER.error("Device ID is required")
-        return
+    """Read the values of devices now, or only the given groups / entities, and update their entities."""
+    # Coordinator -> groups to read, None for all polled groups
+    requests = {}
+    for device_id in call.data.get("device_id", []):
+        coordinator = find_coordinator(hass, device_id)
+        if coordinator is None:
+            raise ServiceValidationError(f"No Modbus TCP/IP device with ID {device_id}")
+        requests[coordinator] = None
 
-    # Get the device entry from the device registry
-    device_registry = dr.async_get(hass)
-    device_entry = device_registry.async_get(device_id)
-    if not device_entry:
-        _LOGGER.error("No device entry found for device ID %s", device_id)
-        return
-    
-    """Find the coordinator corresponding to the given device ID."""
-    for entry_id, coordinator in hass.data[DOMAIN].items():
-        if getattr(coordinator, "device_id", None) == device_id:
-            await coordinator._async_update_data()
-            return
+    if "group" in call.data:
+        for coordinator in requests:
+            requests[coordinator] = set()
+            for name in call.data["group"]:
+                group = coordinator.get_group(name)
+                if group is None:
+                    raise ServiceValidationError(f"{coordinator.devicename} has no group {name}")
+                requests[coordinator].add(group)
+
+    entity_registry = er.async_get(hass)
+    for entity_id in call.data.get("entity_id", []):
+        entity_entry = entity_registry.async_get(entity_id)
+        coordinator = find_coordinator(hass, entity_entry.device_id) if entity_entry is not None else None
+        group = coordinator.get_entity_group(entity_id) if coordinator is not None else None
+        if group is None:
+            raise ServiceValidationError(f"{entity_id} is not a Modbus TCP/IP entity")
+        # Already reading everything if the device was targeted as a whole
+        if coordinator not in requests or requests[coordinator] is not None:
+            requests.setdefault(coordinator, set()).add(group)
+
+    results = await asyncio.gather(*(coordinator.async_request_update(groups) for coordinator, groups in requests.items()),
+                                   return_exceptions=True)
+    for coordinator, result in zip(requests, results):
+        if isinstance(result, Exception):
+            raise HomeAssistantError(f"Updating {coordinator.devicename} failed: {result}") from result
+
+def find_coordinator(hass, device_id) -> ModbusCoordinator | None:
+    """Coordinator of a device registry id."""
+    return hass.data.get(DEVICE_INDEX, {}).get(device_id)
+
+def _service_coordinator(hass, call: ServiceCall) -> ModbusCoordinator:
+    coordinator = find_coordinator(hass, call.data["device_id"])
+    if coordinator is None:
+        raise ServiceValidationError(f"No Modbus TCP/IP device with ID {call.data['device_id']}")
+    return coordinator
 
-    _LOGGER.warning("No coordinator found for device ID %s", device_id)
+def _value_format(call: ServiceCall, register_type: str):
+    """Value type, word order and byte order of a raw register service call, None for raw registers."""
+    if "value_type" not in call.data:
+        return None
+    if register_type not in ("holding", "input"):
+        raise ServiceValidationError(f"value_type can't be used with {register_type} values")
+    return ModbusValueType(call.data["value_type"]), ModbusEndian(call.data["word_order"]), ModbusEndian(call.data["byte_order"])
+
+# Service-calls to read / write register ranges directly
+async def service_read_registers(hass, call: ServiceCall) -> dict:
+    """Read a range of registers or bits in one request, returned as service response data."""
+    coordinator = _service_coordinator(hass, call)
+    register_type, address, count = call.data["register_type"], call.data["address"], call.data["count"]
+    value_format = _value_format(call, register_type)
+
+    try:
+        values = await coordinator.read_raw(register_type, address, count)
+        response = {"register_type": register_type, "address": address, "values": values}
+        if value_format is not None:
+            response["registers"] = values
+            response["values"] = decode_values(values, *value_format)
+    except ValueError as err:
+        raise ServiceValidationError(str(err)) from err
+    except (ModbusException, asyncio.TimeoutError) as err:
+        raise HomeAssistantError(f"Reading {count} {register_type} values at address {address} failed: {err}") from err
+    return response
+
+async def service_write_registers(hass, call: ServiceCall):
+    """Write a range of registers or coils in one request."""
+    coordinator = _service_coordinator(hass, call)
+    register_type, address, values = call.data["register_type"], call.data["address"], call.data["values"]
+    value_format = _value_format(call, register_type)
+
+    try:
+        if value_format is not None:
+            values = encode_values(values, *value_format)
+        await coordinator.write_raw(register_type, address, values)
+    except (ValueError, TypeError, OverflowError, struct.error) as err:
+        # struct.error and OverflowError come from values the value_type can't encode
+        raise ServiceValidationError(str(err)) from err
+    except (ModbusException, asyncio.TimeoutError) as err:
+        raise HomeAssistantError(f"Writing {len(values)} {register_type} values at address {address} failed: {err}") from err
 
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug("Updating Modbus/TCP entry!")
@@ -136,10 +290,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DEVICE_INDEX].pop(coordinator.device_id, None)
+        await coordinator.async_shutdown()
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove stored values when the entry is deleted."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
 async def async_remove_config_entry_device(
     hass: HomeAssistant, config_entry: ConfigEntry, device_entry: DeviceEntry
 ) -> bool:
@@ -38,5 +38,5 @@ class ModbusBinarySensorEntity(ModbusBaseEntity, BinarySensorEntity):
     @property
     def is_on(self):
         """Return the state of the switch."""
-        value = self.coordinator.get_value(self._group, self._key)
+        value = self.coordinator.get_value_by_handle(self._handle)
         return value is not None and value >= 1
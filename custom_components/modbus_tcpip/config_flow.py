@@ -15,8 +15,10 @@ from .const import CONF_MODE_SELECTION, CONF_ADD_TCPIP, CONF_ADD_RTU
 from .const import CONF_SERIAL_PORT, CONF_SERIAL_BAUD
 from .const import DeviceMode
 from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_FAST
+from .const import CONF_MAX_INFLIGHT, DEFAULT_MAX_INFLIGHT
+from .const import CONF_FAST_POLL_AFTER_WRITE, DEFAULT_FAST_POLL_AFTER_WRITE
 
-from .devices.helpers import get_available_drivers
+from .devices.helpers import get_driver_index
 
 CONFIG_ENTRY_NAME = "Modbus TCP/IP"
 
@@ -28,7 +30,9 @@ DEVICE_DATA_TCPIP = {
     CONF_PORT: 502,
     CONF_SLAVE_ID: 1,
     CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
-    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST
+    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST,
+    CONF_FAST_POLL_AFTER_WRITE: DEFAULT_FAST_POLL_AFTER_WRITE,
+    CONF_MAX_INFLIGHT: DEFAULT_MAX_INFLIGHT
 }
 
 DEVICE_DATA_RTU = {
@@ -39,7 +43,8 @@ DEVICE_DATA_RTU = {
     CONF_SERIAL_BAUD: 9600,
     CONF_SLAVE_ID: 1,
     CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
-    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST
+    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST,
+    CONF_FAST_POLL_AFTER_WRITE: DEFAULT_FAST_POLL_AFTER_WRITE
 }
 
 _LOGGER = logging.getLogger(__name__)
@@ -151,7 +156,7 @@ async def getDeviceSchema(user_input: dict[str, Any] | None = None, ports = None
 
 # Schema taking device details when adding or updating tcp/ip device
 async def getTcpIpDeviceSchema(user_input: dict[str, Any] | None = None) -> vol.Schema:
-    DEVICE_MODELS = sorted(await get_available_drivers())
+    DEVICE_MODELS = await async_get_driver_options()
 
     data_schema = vol.Schema(
         {
@@ -162,6 +167,8 @@ async def getTcpIpDeviceSchema(user_input: dict[str, Any] | None = None) -> vol.
             vol.Optional(CONF_SLAVE_ID, description="Slave ID", default=user_input[CONF_SLAVE_ID]): vol.All(vol.Coerce(int), vol.Range(min=0, max=256)),
             vol.Optional(CONF_SCAN_INTERVAL, default=user_input[CONF_SCAN_INTERVAL]): vol.All(vol.Coerce(int), vol.Range(min=5, max=999)),
             vol.Optional(CONF_SCAN_INTERVAL_FAST, default=user_input[CONF_SCAN_INTERVAL_FAST]): vol.All(vol.Coerce(int), vol.Range(min=1, max=999)),
+            vol.Optional(CONF_FAST_POLL_AFTER_WRITE, default=user_input.get(CONF_FAST_POLL_AFTER_WRITE, DEFAULT_FAST_POLL_AFTER_WRITE)): cv.boolean,
+            vol.Optional(CONF_MAX_INFLIGHT, default=user_input.get(CONF_MAX_INFLIGHT, DEFAULT_MAX_INFLIGHT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
         }
     )
 
@@ -169,7 +176,7 @@ async def getTcpIpDeviceSchema(user_input: dict[str, Any] | None = None) -> vol.
 
 # Schema taking device details when adding or updating RTU device
 async def getRtuDeviceSchema(user_input: dict[str, Any] | None = None, ports = None) -> vol.Schema:
-    DEVICE_MODELS = sorted(await get_available_drivers())
+    DEVICE_MODELS = await async_get_driver_options()
     baud_rates = [9600, 14400, 19200, 38400, 57600, 115200, 230400, 460800, 921600]
 
     data_schema = vol.Schema(
@@ -181,6 +188,7 @@ async def getRtuDeviceSchema(user_input: dict[str, Any] | None = None, ports = N
             vol.Required(CONF_SLAVE_ID, description="Slave ID", default=user_input[CONF_SLAVE_ID]): vol.All(vol.Coerce(int), vol.Range(min=0, max=256)),
             vol.Optional(CONF_SCAN_INTERVAL, default=user_input[CONF_SCAN_INTERVAL]): vol.All(vol.Coerce(int), vol.Range(min=5, max=999)),
             vol.Optional(CONF_SCAN_INTERVAL_FAST, default=user_input[CONF_SCAN_INTERVAL_FAST]): vol.All(vol.Coerce(int), vol.Range(min=1, max=999)),
+            vol.Optional(CONF_FAST_POLL_AFTER_WRITE, default=user_input.get(CONF_FAST_POLL_AFTER_WRITE, DEFAULT_FAST_POLL_AFTER_WRITE)): cv.boolean,
         }
     )
 
@@ -189,6 +197,11 @@ async def getRtuDeviceSchema(user_input: dict[str, Any] | None = None, ports = N
 """ ################################################### """
 """                         HELPERS                     """
 """ ################################################### """
+async def async_get_driver_options() -> list[selector.SelectOptionDict]:
+    # Drivers labelled with manufacturer, model and the entity platforms they create
+    drivers = sorted((await get_driver_index()).values(), key=lambda info: info.label.casefold())
+    return [selector.SelectOptionDict(value=info.name, label=info.label) for info in drivers]
+
 async def async_get_ports():
     # Run the blocking glob call in a separate thread to avoid blocking the event loop
     try:
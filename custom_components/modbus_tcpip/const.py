@@ -3,6 +3,8 @@ from homeassistant.const import Platform
 
 # Global Constants
 DOMAIN: str = "modbus_tcpip"
+STORAGE_VERSION: int = 1
+DEVICE_INDEX: str = f"{DOMAIN}_devices"    # hass.data key, device registry id -> coordinator
 PLATFORMS = [Platform.BINARY_SENSOR, Platform.BUTTON, Platform.NUMBER, Platform.SELECT, Platform.SENSOR, Platform.SWITCH]
 
 # Configuration Device Constants
@@ -12,10 +14,14 @@ CONF_DEVICE_MODEL: str = "device_model"
 CONF_SLAVE_ID: str = "slave_id"
 CONF_SCAN_INTERVAL: str = "scan_interval"
 CONF_SCAN_INTERVAL_FAST: str = "scan_interval_fast"
+CONF_MAX_INFLIGHT: str = "max_inflight"
+CONF_FAST_POLL_AFTER_WRITE: str = "fast_poll_after_write"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL: int = 300  # Seconds
 DEFAULT_SCAN_INTERVAL_FAST: int = 5  # Seconds
+DEFAULT_MAX_INFLIGHT: int = 1  # Requests, 1 = sequential reads
+DEFAULT_FAST_POLL_AFTER_WRITE: bool = False  # Confirm writes by reading back only the written value
 
 # Configuration mode selection
 CONF_MODE_SELECTION = "mode_selection"
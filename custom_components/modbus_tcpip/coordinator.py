@@ -1,18 +1,31 @@
 import async_timeout
+import asyncio
 import datetime as dt
 import logging
+import time
 import traceback
 
+from homeassistant.core import callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed, ConfigEntryNotReady, ConfigEntryError
 
 from .devices.helpers import load_device_class
-from .devices.datatypes import ModbusDefaultGroups
+from .devices.datatypes import ModbusDefaultGroups, ModbusMode, ModbusGroup
+from .pollscheduler import ModbusPollScheduler, poll_phase, FIRST_REFRESH_STAGGER
 
 _LOGGER = logging.getLogger(__name__)
 
+# Read-back after writes, with exponential backoff until the value settles
+WRITE_CONFIRM_DELAY: float = 0.5  # Seconds
+WRITE_CONFIRM_MAX_DELAY: float = 8.0  # Seconds
+WRITE_CONFIRM_TIMEOUT: float = 30.0  # Seconds
+
+# Values restored from storage are read from the device again this long after startup
+SNAPSHOT_REVALIDATE_DELAY: float = 60.0  # Seconds
+
 class ModbusCoordinator(DataUpdateCoordinator):    
-    def __init__(self, hass, device, device_model:str, connection_params, scan_interval, scan_interval_fast):
+    def __init__(self, hass, device, device_model:str, connection_params, scan_interval, scan_interval_fast,
+                 fast_poll_after_write: bool = False, store = None, endpoint_index: int = 0):
         """Initialize coordinator parent"""
         super().__init__(
             hass,
@@ -28,12 +41,18 @@ class ModbusCoordinator(DataUpdateCoordinator):
 
         self._fast_poll_enabled = False
         self._fast_poll_count = 0
+        self._read_all_groups = False
         self._normal_poll_interval = scan_interval
         self._fast_poll_interval = scan_interval_fast
 
+        # Fast poll the whole device after writes, instead of reading back the written value
+        self._fast_poll_after_write = fast_poll_after_write
+        self._confirm_tasks = {}
+
         self._device = device
 
         self._modbusDevice = None
+        self._pollScheduler = None
 
         # Storage for config selection
         self.config_selection = 0
@@ -41,6 +60,29 @@ class ModbusCoordinator(DataUpdateCoordinator):
         # Callback to entities
         self._update_callbacks = {}  
 
+        # Group of each entity by entity_id, for targeted updates
+        self._entity_groups = {}
+
+        # Update requested through the service, and the groups it reads (None for all)
+        self._update_task = None
+        self._update_groups = None
+
+        # Availability last pushed to entities, they all need an update when it changes
+        self._notified_success = None
+
+        # Device info last written to the device registry
+        self._published_device_info = None
+        self.device_info_updates_skipped = 0
+
+        # POLL_ONCE values and device info persisted across restarts (homeassistant.helpers.storage.Store)
+        self._store = store
+        self._saved_snapshot = None
+        self._revalidate_task = None
+
+        # Position among the devices on the same gateway / bus, spreads their polls over the interval
+        self.endpoint_index = endpoint_index
+        self._poll_phase = poll_phase(endpoint_index)
+
     async def _async_setup(self):
         # Load modbus device driver
         device_class = await load_device_class(self.device_model)
@@ -52,6 +94,37 @@ class ModbusCoordinator(DataUpdateCoordinator):
         else:
             raise ConfigEntryError
 
+        # Come up with the values from the last run, instead of reading static groups again
+        if self._store is not None:
+            stored = await self._store.async_load()
+            if stored and stored.get("device_model") == self.device_model:
+                # Known to the store either way, an unchanged snapshot isn't saved again
+                self._saved_snapshot = stored.get("snapshot")
+                if self._modbusDevice.restoreSnapshot(stored.get("snapshot", {})):
+                    _LOGGER.debug("Restored POLL_ONCE values for %s", self.devicename)
+
+        # Groups may poll at their own interval, the coordinator wakes up whenever one is due
+        self._pollScheduler = ModbusPollScheduler(self._modbusDevice.getPollGroups(firstRead=False), self._normal_poll_interval)
+
+        # Don't let all devices on one endpoint connect and read at the same moment on startup
+        if self.endpoint_index > 0:
+            await asyncio.sleep(FIRST_REFRESH_STAGGER * self.endpoint_index)
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and hand the connection back to the pool."""
+        await super().async_shutdown()
+        for task in self._confirm_tasks.values():
+            task.cancel()
+        self._confirm_tasks.clear()
+        if self._revalidate_task is not None:
+            self._revalidate_task.cancel()
+            self._revalidate_task = None
+        if self._update_task is not None:
+            self._update_task.cancel()
+            self._update_task = None
+        if self._modbusDevice is not None:
+            self._modbusDevice.close()
+
     @property
     def device_id(self):
         return self._device.id
@@ -64,6 +137,14 @@ class ModbusCoordinator(DataUpdateCoordinator):
     def identifiers(self):
         return self._device.identifiers
 
+    @property
+    def stats(self):
+        return self._modbusDevice.stats
+
+    @property
+    def poll_overruns(self) -> int:
+        return self._pollScheduler.overruns if self._pollScheduler is not None else 0
+
     def setFastPollMode(self):
         _LOGGER.debug("Enabling fast poll mode")
         self._fast_poll_enabled = True
@@ -74,7 +155,7 @@ class ModbusCoordinator(DataUpdateCoordinator):
     def setNormalPollMode(self):
         _LOGGER.debug("Enabling normal poll mode")
         self._fast_poll_enabled = False
-        self.update_interval = dt.timedelta(seconds=self._normal_poll_interval)
+        self.update_interval = dt.timedelta(seconds=self._pollScheduler.time_to_next_due())
 
 
     async def _async_update_data(self):
@@ -86,25 +167,145 @@ class ModbusCoordinator(DataUpdateCoordinator):
             if self._fast_poll_count > 5:
                 self.setNormalPollMode()
 
+        """ Select groups, all of them while fast polling or on request """
+        if self._fast_poll_enabled or self._read_all_groups:
+            self._read_all_groups = False
+            groups = self._pollScheduler.groups
+        else:
+            groups = self._pollScheduler.due_groups()
+
         """ Fetch data """
+        first_read = self._modbusDevice.firstRead
+        if first_read and self._poll_phase > 0:
+            # Shift the schedule once, later polls keep the offset
+            self._pollScheduler.start(phase=self._poll_phase)
         try:
             async with async_timeout.timeout(20):
-                await self._modbusDevice.readData()
+                await self._modbusDevice.readData(groups)
         except Exception as err:
             _LOGGER.debug("Failed when fetching data: %s", traceback.format_exc())
             raise UpdateFailed("Could not read data from device!") from err
+        finally:
+            if not self._fast_poll_enabled:
+                self.update_interval = dt.timedelta(seconds=self._pollScheduler.time_to_next_due())
         
         await self._async_update_deviceInfo()
 
+        if first_read:
+            if self._modbusDevice.pollOnceRestored:
+                self._revalidate_task = self.hass.async_create_background_task(
+                    self._async_revalidate_snapshot(), name=f"{self.name} revalidate"
+                )
+            else:
+                self._async_save_snapshot()
+
+    ################################
+    ####### Requested update #######
+    ################################
+    async def async_request_update(self, groups: set[ModbusGroup] | None = None):
+        """Read the given groups (all polled groups if None) now and push the new values to entities.
+
+        A request covered by the update in flight joins it, otherwise it is started when that one is done.
+        """
+        while self._update_task is not None and not self._update_task.done():
+            task = self._update_task
+            if self._update_groups is None or (groups is not None and groups <= self._update_groups):
+                return await asyncio.shield(task)
+            await asyncio.wait([task])
+
+        self._update_groups = groups
+        self._update_task = task = self.hass.async_create_task(self._async_read_requested(groups), name=f"{self.name} update")
+        return await asyncio.shield(task)
+
+    async def _async_read_requested(self, groups: set[ModbusGroup] | None):
+        if groups is None:
+            # Through the regular refresh, which tracks availability and notifies all entities
+            self._read_all_groups = True
+            await self.async_refresh()
+            if not self.last_update_success:
+                raise UpdateFailed("Could not read data from device!")
+            return
+
+        try:
+            async with async_timeout.timeout(20):
+                await self._modbusDevice.readData([group for group in groups if group.mode != ModbusMode.NONE])
+        except Exception as err:
+            raise UpdateFailed("Could not read data from device!") from err
+        self.async_update_listeners()
+
+    def get_group(self, name: str) -> ModbusGroup | None:
+        return self._modbusDevice.getGroup(name)
+
+    def registerEntity(self, entity_id: str, group: ModbusGroup):
+        self._entity_groups[entity_id] = group
+
+    def unregisterEntity(self, entity_id: str):
+        self._entity_groups.pop(entity_id, None)
+
+    def get_entity_group(self, entity_id: str) -> ModbusGroup | None:
+        return self._entity_groups.get(entity_id)
+
+    ################################
+    ########### Snapshot ###########
+    ################################
+    @callback
+    def _async_save_snapshot(self) -> None:
+        if self._store is None:
+            return
+        snapshot = self._modbusDevice.getSnapshot()
+        if snapshot != self._saved_snapshot:
+            self._saved_snapshot = snapshot
+            self._store.async_delay_save(lambda: {"device_model": self.device_model, "snapshot": snapshot}, 10)
+
+    async def _async_revalidate_snapshot(self):
+        """Read the restored POLL_ONCE groups from the device once startup has settled."""
+        await asyncio.sleep(SNAPSHOT_REVALIDATE_DELAY)
+        try:
+            await self._modbusDevice.refreshPollOnce()
+        except Exception as err:
+            _LOGGER.debug("Revalidating restored values failed, keeping them: %s", err)
+            return
+        finally:
+            self._revalidate_task = None
+
+        self._async_save_snapshot()
+        await self._async_update_deviceInfo()
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose datapoint changed, all of them if availability changed."""
+        if self._modbusDevice is None:
+            super().async_update_listeners()
+            return
+
+        changed = self._modbusDevice.popChangedHandles()
+        if self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+
+        # Entities are registered with their datapoint handle as context
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in changed:
+                update_callback()
+
     async def _async_update_deviceInfo(self) -> None:
+        device_info = {
+            "manufacturer": self._modbusDevice.manufacturer,
+            "model": self._modbusDevice.model,
+            "sw_version": self._modbusDevice.sw_version,
+            "serial_number": self._modbusDevice.serial_number,
+        }
+
+        # Mostly static values, only touch the registry when something changed
+        if device_info == self._published_device_info:
+            self.device_info_updates_skipped += 1
+            return
+
         device_registry = dr.async_get(self.hass)
-        device_registry.async_update_device(
-            self.device_id,
-            manufacturer=self._modbusDevice.manufacturer,
-            model=self._modbusDevice.model,
-            sw_version=self._modbusDevice.sw_version,
-            serial_number=self._modbusDevice.serial_number,
-        )
+        device_registry.async_update_device(self.device_id, **device_info)
+        self._published_device_info = device_info
         _LOGGER.debug("Updated device data for: %s", self.devicename) 
 
     ################################
@@ -117,7 +318,8 @@ class ModbusCoordinator(DataUpdateCoordinator):
     async def config_select(self, key, value):
         self.config_selection = value
         try:
-            await self._modbusDevice.readValue(ModbusDefaultGroups.CONFIG, key)
+            # The whole group is read once and cached, browsing the selection doesn't touch the bus
+            await self._modbusDevice.readConfig()
         finally:
             await self._update_callbacks["Config Value"](ModbusDefaultGroups.CONFIG, key)
 
@@ -130,19 +332,98 @@ class ModbusCoordinator(DataUpdateCoordinator):
     ################################
     ######### Read / Write #########
     ################################   
+    def get_handle(self, group, key) -> int | None:
+        return self._modbusDevice.getHandle(group, key)
+
     def get_value(self, group, key):
-        if group in self._modbusDevice.Datapoints:
-            if key in self._modbusDevice.Datapoints[group]:
-                return self._modbusDevice.Datapoints[group][key].Value
-        return None
+        handle = self._modbusDevice.getHandle(group, key)
+        return self.get_value_by_handle(handle)
 
     def get_attrs(self, group, key):
-        if group in self._modbusDevice.Datapoints:
-            if key in self._modbusDevice.Datapoints[group]:
-                return self._modbusDevice.Datapoints[group][key].Attrs
-        return None
+        handle = self._modbusDevice.getHandle(group, key)
+        return self.get_attrs_by_handle(handle)
+
+    def get_value_by_handle(self, handle):
+        if handle is None:
+            return None
+        return self._modbusDevice.getDatapoint(handle).Value
+
+    def get_attrs_by_handle(self, handle):
+        if handle is None:
+            return None
+        return self._modbusDevice.getDatapoint(handle).Attrs
 
     async def write_value(self, group, key, value) -> bool:
         _LOGGER.debug("Write_Data: %s - %s - %s", group, key, value)
         await self._modbusDevice.writeValue(group, key, value)
-        self.setFastPollMode()
+
+        if self._fast_poll_after_write:
+            self.setFastPollMode()
+        elif group.mode != ModbusMode.NONE:
+            # Restart confirmation if the same value is written again
+            task = self._confirm_tasks.pop((group, key), None)
+            if task is not None:
+                task.cancel()
+            self._confirm_tasks[(group, key)] = self.hass.async_create_background_task(
+                self._async_confirm_write(group, key, value), name=f"{self.name} confirm {key}"
+            )
+
+    async def read_raw(self, register_type: str, address: int, count: int) -> list:
+        return await self._modbusDevice.readRaw(register_type, address, count)
+
+    async def write_raw(self, register_type: str, address: int, values: list):
+        _LOGGER.debug("Write_Raw: %s - %s - %s", register_type, address, values)
+        await self._modbusDevice.writeRaw(register_type, address, values)
+
+        if self._fast_poll_after_write:
+            self.setFastPollMode()
+            return
+
+        # Read back the groups with datapoints in the written range. Coils aren't mapped to datapoints,
+        # so any polled value may have changed.
+        if register_type == "holding":
+            groups = self._modbusDevice.getGroupsAt(ModbusMode.HOLDING, address, len(values))
+            if not groups:
+                return
+        else:
+            groups = set(self._pollScheduler.groups)
+        try:
+            await self.async_request_update(groups)
+        except UpdateFailed as err:
+            _LOGGER.warning("Reading back values after writing %s at address %s failed: %s", register_type, address, err)
+
+    async def _async_confirm_write(self, group, key, value):
+        """Read back only the written datapoint, backing off until it matches or stops changing."""
+        datapoint = self._modbusDevice.Datapoints[group][key]
+        deadline = time.monotonic() + WRITE_CONFIRM_TIMEOUT
+        delay = WRITE_CONFIRM_DELAY
+        previous = None
+
+        try:
+            while time.monotonic() + delay <= deadline:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WRITE_CONFIRM_MAX_DELAY)
+
+                try:
+                    new_value = await self._modbusDevice.readValue(group, key)
+                except Exception as err:
+                    _LOGGER.debug("Read-back of %s failed: %s", key, err)
+                    continue
+
+                self.async_update_listeners()
+                if self._values_match(new_value, value, datapoint.Scaling) or (previous is not None and new_value == previous):
+                    _LOGGER.debug("Write of %s confirmed: %s", key, new_value)
+                    return
+                previous = new_value
+
+            _LOGGER.debug("Value of %s did not settle after write", key)
+        finally:
+            if self._confirm_tasks.get((group, key)) is asyncio.current_task():
+                del self._confirm_tasks[(group, key)]
+
+    @staticmethod
+    def _values_match(a, b, scaling) -> bool:
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            # Within half a raw step, to allow for scaling round-off
+            return abs(a - b) <= abs(scaling) / 2
+        return a == b
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+
+from collections import deque, OrderedDict
+from enum import IntEnum
+from typing import Awaitable, Callable
+
+from pymodbus.exceptions import ModbusException
+
+_LOGGER = logging.getLogger(__name__)
+
+class RequestPriority(IntEnum):
+    HIGH = 0        # User writes and interactive reads
+    NORMAL = 1      # Background polling
+
+class SlotUnavailable(ModbusException):
+    """Raised by a request when the slot it was given can't be used, e.g. the gateway refused another connection."""
+
+def rtu_silent_interval(baud_rate: int) -> float:
+    """The 3.5 character silent interval between RTU frames, in seconds."""
+    # 11 bits per character. Above 19200 baud the spec fixes the interval at 1.75 ms.
+    if baud_rate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baud_rate
+
+class ModbusBusScheduler:
+    """Queues requests on one bus and sends them in order of priority.
+
+    Within a priority, slaves are served round robin so one device with a long poll cycle
+    can't starve the others. frame_gap is the silence enforced between two frames.
+
+    Each slot (e.g. a TCP connection to the gateway) has one worker sending one request at a time,
+    so a client is never asked for a second request while a response is outstanding. Request timeouts
+    applied inside a request therefore start when it's sent. A slave has at most its limit (default 1)
+    of requests outstanding, whatever the number of slots.
+    """
+
+    def __init__(self, name, frame_gap: float = 0.0):
+        self._name = name
+        self._frame_gap = frame_gap
+
+        # Per priority: slave -> queue of (request, future), in round robin order
+        self._lanes = {priority: OrderedDict() for priority in RequestPriority}
+        self._wakeup = asyncio.Event()
+        self._last_frame = 0.0
+
+        # Workers by slot, slots refused by the transport are left out until restore_slots
+        self._slots = 1
+        self._workers: dict[int, asyncio.Task] = {}
+        self._retired: set[int] = set()
+
+        # Requests outstanding and allowed per slave
+        self._inflight: dict[int, int] = {}
+        self._limits: dict[int, int] = {}
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @slots.setter
+    def slots(self, value: int):
+        self._slots = max(1, value)
+        if self.pending:
+            self._start_workers()
+
+    def set_limit(self, slave: int, limit: int):
+        """Number of requests the slave may have outstanding at once."""
+        self._limits[slave] = max(1, limit)
+        self._wakeup.set()
+
+    def restore_slots(self):
+        """Try the slots refused earlier again, e.g. after reconnecting."""
+        self._retired.clear()
+        if self.pending:
+            self._start_workers()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue) for lane in self._lanes.values() for queue in lane.values())
+
+    async def submit(self, slave: int, priority: RequestPriority, request: Callable[[], Awaitable]):
+        """Queue a request and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].setdefault(slave, deque()).append((request, future))
+        self._start_workers()
+        self._wakeup.set()
+        return await future
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+
+        for lane in self._lanes.values():
+            for queue in lane.values():
+                for _, future in queue:
+                    if not future.done():
+                        future.set_exception(ModbusException(f"Connection {self._name} closed"))
+            lane.clear()
+
+    def _start_workers(self):
+        for slot in range(self._slots):
+            task = self._workers.get(slot)
+            if slot not in self._retired and (task is None or task.done()):
+                self._workers[slot] = asyncio.create_task(self._worker(slot))
+
+    def _next(self):
+        for priority, lane in self._lanes.items():
+            for slave in list(lane):
+                if self._inflight.get(slave, 0) >= self._limits.get(slave, 1):
+                    continue
+
+                # Rotate this slave to the back of the lane
+                queue = lane.pop(slave)
+                job = None
+                while queue and job is None:
+                    request, future = queue.popleft()
+                    if not future.done():   # Skip requests whose caller has given up
+                        job = (priority, slave, request, future)
+                if queue:
+                    lane[slave] = queue
+                if job is not None:
+                    return job
+        return None
+
+    async def _worker(self, slot: int):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            priority, slave, request, future = job
+            if self._frame_gap > 0:
+                delay = self._last_frame + self._frame_gap - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            self._inflight[slave] = self._inflight.get(slave, 0) + 1
+            try:
+                result = await request(slot)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except SlotUnavailable as err:
+                # Hand the request to another slot and stop this one, the first slot is never retired
+                if slot == 0:
+                    if not future.done():
+                        future.set_exception(err)
+                    continue
+                _LOGGER.debug("Slot %s of %s unavailable: %s", slot, self._name, err)
+                lane = self._lanes[priority]
+                lane[slave] = lane.get(slave, deque())
+                lane[slave].appendleft((request, future))
+                lane.move_to_end(slave, last=False)
+                self._retired.add(slot)
+                del self._workers[slot]
+                return
+            except Exception as err:
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._inflight[slave] -= 1
+                self._last_frame = loop.time()
+                self._wakeup.set()
@@ -0,0 +1,155 @@
+import logging
+import struct
+
+from functools import lru_cache
+from typing import List, Tuple
+
+from .datatypes import ModbusValueType, ModbusEndian, ModbusDatapoint, VALUE_TYPE_LENGTH
+
+_LOGGER = logging.getLogger(__name__)
+
+# struct codes, all values are decoded big endian after word and byte order are normalized
+_STRUCT_CODES = {
+    ModbusValueType.INT16: "h",
+    ModbusValueType.UINT16: "H",
+    ModbusValueType.INT32: "i",
+    ModbusValueType.UINT32: "I",
+    ModbusValueType.FLOAT32: "f",
+    ModbusValueType.FLOAT64: "d",
+}
+
+_STRING_TYPES = (ModbusValueType.STRING, ModbusValueType.STRING_UTF16)
+
+# (register offset, length, type, word order, byte order)
+CodecField = Tuple[int, int, ModbusValueType, ModbusEndian, ModbusEndian]
+
+def datapoint_field(offset: int, datapoint: ModbusDatapoint) -> CodecField:
+    return (offset, datapoint.Length, datapoint.ValueType, datapoint.WordOrder, datapoint.ByteOrder)
+
+def _swap_bytes(register: int) -> int:
+    return ((register & 0xFF) << 8) | (register >> 8)
+
+class ModbusBlockCodec:
+    """Decoder for one read response, compiled once from the layout of its datapoints.
+
+    Registers are packed into bytes and all fields are unpacked with a single precompiled
+    struct, with gaps skipped as padding. Word and byte order are normalized up front
+    through a precomputed register permutation and a list of registers to byte swap.
+    """
+
+    def __init__(self, count: int, fields: List[CodecField]):
+        self.count = count
+        self._types = [field[2] for field in fields]
+
+        permutation = list(range(count))
+        self._byteswap = []
+        for offset, length, value_type, word_order, byte_order in fields:
+            if word_order == ModbusEndian.LITTLE and value_type not in _STRING_TYPES:
+                permutation[offset:offset + length] = reversed(permutation[offset:offset + length])
+            if byte_order == ModbusEndian.LITTLE:
+                self._byteswap.extend(range(offset, offset + length))
+        self._permutation = None if permutation == list(range(count)) else permutation
+
+        self._pack = struct.Struct(f">{count}H")
+
+        # One struct for the whole block, unless datapoints overlap
+        position = 0
+        codes = []
+        for offset, length, value_type, _, _ in fields:
+            if offset < position:
+                codes = None
+                break
+            if offset > position:
+                codes.append(f"{(offset - position) * 2}x")
+            codes.append(_STRUCT_CODES.get(value_type, f"{length * 2}s"))
+            position = offset + length
+
+        if codes is not None:
+            self._unpack = struct.Struct(">" + "".join(codes)).unpack_from
+        else:
+            structs = [(struct.Struct(">" + _STRUCT_CODES.get(field[2], f"{field[1] * 2}s")), field[0] * 2) for field in fields]
+            self._unpack = lambda raw: tuple(s.unpack_from(raw, offset)[0] for s, offset in structs)
+
+    def decode(self, registers: List[int]) -> list:
+        """Decode a response into one raw (unscaled) value per field."""
+        if len(registers) < self.count:
+            raise ValueError(f"Expected {self.count} registers, got {len(registers)}")
+
+        if self._permutation is not None:
+            registers = [registers[i] for i in self._permutation]
+        elif self._byteswap:
+            registers = list(registers)
+        for i in self._byteswap:
+            registers[i] = _swap_bytes(registers[i])
+
+        values = list(self._unpack(self._pack.pack(*registers[:self.count])))
+
+        for i, value_type in enumerate(self._types):
+            if value_type == ModbusValueType.STRING:
+                values[i] = values[i].decode("latin-1").rstrip("\x00")
+            elif value_type == ModbusValueType.STRING_UTF16:
+                values[i] = values[i].decode("utf-16-be", "surrogatepass").rstrip("\x00")
+        return values
+
+@lru_cache(maxsize=None)
+def compile_codec(count: int, fields: Tuple[CodecField, ...]) -> ModbusBlockCodec:
+    """Codecs are immutable, blocks with the same layout share one."""
+    return ModbusBlockCodec(count, list(fields))
+
+def decode_value(registers: List[int], value_type: ModbusValueType,
+                 word_order: ModbusEndian = ModbusEndian.BIG, byte_order: ModbusEndian = ModbusEndian.BIG):
+    """Decode a single value occupying all of registers."""
+    length = len(registers)
+    codec = compile_codec(length, ((0, length, value_type, word_order, byte_order),))
+    return codec.decode(registers)[0]
+
+def decode_values(registers: List[int], value_type: ModbusValueType,
+                  word_order: ModbusEndian = ModbusEndian.BIG, byte_order: ModbusEndian = ModbusEndian.BIG) -> list:
+    """Decode consecutive values of one type, a string takes all of registers."""
+    length = VALUE_TYPE_LENGTH.get(value_type, len(registers))
+    if not registers or len(registers) % length:
+        raise ValueError(f"{len(registers)} registers can't be decoded as {value_type.value}")
+    # One-off layouts (service calls), so the codec isn't cached
+    fields = [(offset, length, value_type, word_order, byte_order) for offset in range(0, len(registers), length)]
+    return ModbusBlockCodec(len(registers), fields).decode(registers)
+
+def encode_values(values: list, value_type: ModbusValueType,
+                  word_order: ModbusEndian = ModbusEndian.BIG, byte_order: ModbusEndian = ModbusEndian.BIG) -> List[int]:
+    """Encode consecutive values of one type, strings take the registers their characters need."""
+    registers = []
+    for value in values:
+        if value_type == ModbusValueType.STRING:
+            length = (len(str(value)) + 1) // 2
+        elif value_type == ModbusValueType.STRING_UTF16:
+            length = len(str(value))
+        else:
+            length = VALUE_TYPE_LENGTH[value_type]
+        registers.extend(encode_value(value, value_type, length, word_order, byte_order))
+    return registers
+
+def encode_value(value, value_type: ModbusValueType, length: int,
+                 word_order: ModbusEndian = ModbusEndian.BIG, byte_order: ModbusEndian = ModbusEndian.BIG) -> List[int]:
+    """Encode a raw (unscaled) value into registers."""
+    if value_type in _STRING_TYPES:
+        if value_type == ModbusValueType.STRING:
+            raw = str(value).encode("latin-1")[:length * 2].ljust(length * 2, b"\x00")
+        else:
+            raw = str(value).encode("utf-16-be", "surrogatepass")[:length * 2].ljust(length * 2, b"\x00")
+        registers = list(struct.unpack(f">{length}H", raw))
+    elif value_type in (ModbusValueType.FLOAT32, ModbusValueType.FLOAT64):
+        count = VALUE_TYPE_LENGTH[value_type]
+        registers = list(struct.unpack(f">{count}H", struct.pack(">" + _STRUCT_CODES[value_type], value)))
+    else:
+        # Integers are accepted as signed or unsigned as long as they fit the register width
+        bits = 16 * VALUE_TYPE_LENGTH[value_type]
+        value = int(round(value))
+        if not -(1 << (bits - 1)) <= value < (1 << bits):
+            raise ValueError(f"Value {value} does not fit in {value_type.value}")
+        value &= (1 << bits) - 1
+        registers = [(value >> (16 * i)) & 0xFFFF for i in reversed(range(bits // 16))]
+
+    if word_order == ModbusEndian.LITTLE and value_type not in _STRING_TYPES:
+        registers.reverse()
+    if byte_order == ModbusEndian.LITTLE:
+        registers = [_swap_bytes(register) for register in registers]
+    return registers
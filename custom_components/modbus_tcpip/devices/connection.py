@@ -1,15 +1,29 @@
-class ConnectionParams:
+import abc
+
+class ConnectionParams(abc.ABC):
     """Base class for connection parameters."""
-    pass
+    @property
+    @abc.abstractmethod
+    def key(self) -> tuple:
+        """Identifies the physical transport, devices with equal keys share one connection."""
 
 class TCPConnectionParams(ConnectionParams):
-    def __init__(self, ip: str, port: int, slave_id: int = 1):
+    def __init__(self, ip: str, port: int, slave_id: int = 1, max_inflight: int = 1):
         self.ip = ip
         self.port = port
         self.slave_id = slave_id
+        self.max_inflight = max_inflight    # Outstanding requests allowed for this device
+
+    @property
+    def key(self) -> tuple:
+        return ("tcp", self.ip, self.port)
 
 class RTUConnectionParams(ConnectionParams):
     def __init__(self, serial_port: str, baud_rate: int, slave_id: int = 1):
         self.serial_port = serial_port
         self.baud_rate = baud_rate
-        self.slave_id = slave_id
\ No newline at end of file
+        self.slave_id = slave_id
+
+    @property
+    def key(self) -> tuple:
+        return ("rtu", self.serial_port, self.baud_rate)
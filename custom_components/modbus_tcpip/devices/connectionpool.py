@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import random
+import socket
+
+from enum import Enum
+
+from pymodbus.client import AsyncModbusTcpClient, AsyncModbusSerialClient
+from pymodbus.exceptions import ConnectionException
+
+from .busscheduler import ModbusBusScheduler, RequestPriority, SlotUnavailable, rtu_silent_interval
+from .connection import ConnectionParams, TCPConnectionParams, RTUConnectionParams
+from .health import RttEstimator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Reconnect backoff, doubled after every failed attempt
+RECONNECT_DELAY: float = 1.0  # Seconds
+RECONNECT_MAX_DELAY: float = 60.0  # Seconds
+
+# TCP connections unused for this long are closed, and reopened by the next request
+IDLE_DISCONNECT_TIMEOUT: float = 60.0  # Seconds
+
+# TCP keepalive, detects a dead gateway between polls
+KEEPALIVE_IDLE: int = 30  # Seconds
+KEEPALIVE_INTERVAL: int = 10  # Seconds
+KEEPALIVE_COUNT: int = 3
+
+class ConnectionState(Enum):
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    BACKOFF = "backoff"         # Last attempt failed, waiting before the next one
+    CLOSED = "closed"           # Released by all devices, can't be used again
+
+class ModbusConnection:
+    """One transport (TCP gateway or serial port) shared by every device behind it.
+
+    The connection is opened by the first request and reopened by the first request after it was lost,
+    with exponential backoff and jitter between failed attempts. Reconnecting is handled here, not by pymodbus.
+
+    pymodbus holds a client until the response to its request arrives, so requests only overlap on separate
+    clients. A TCP connection opens one extra client per additional request in flight (see allow_inflight),
+    and stops using one if the gateway refuses it.
+    """
+
+    def __init__(self, connection_params: ConnectionParams):
+        self._tcp_params = None
+        self._slot_clients = {}
+        if isinstance(connection_params, TCPConnectionParams):
+            self._tcp_params = connection_params
+            self._client = AsyncModbusTcpClient(host=connection_params.ip, port=connection_params.port, reconnect_delay=0)
+            frame_gap = 0.0
+            self.idle_timeout = IDLE_DISCONNECT_TIMEOUT
+        elif isinstance(connection_params, RTUConnectionParams):
+            self._client = AsyncModbusSerialClient(port=connection_params.serial_port, baudrate=connection_params.baud_rate,
+                                                   reconnect_delay=0)
+            frame_gap = rtu_silent_interval(connection_params.baud_rate)
+            # Opening a serial port is cheap and nothing times it out, keep it open
+            self.idle_timeout = None
+        else:
+            raise ValueError("Unsupported connection parameters")
+
+        self.key = connection_params.key
+        self.refcount = 0
+
+        # All frames go through the scheduler, one at a time
+        self._scheduler = ModbusBusScheduler(self.key, frame_gap=frame_gap)
+        self._connect_lock = asyncio.Lock()
+
+        # Lifecycle
+        self.state = ConnectionState.DISCONNECTED
+        self.reconnects = 0
+        self._failed_attempts = 0
+        self._next_attempt = 0.0
+        self._idle_handle = None
+        self._active = 0
+
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def connected(self) -> bool:
+        return self.state == ConnectionState.CONNECTED and self._client.connected
+
+    async def connect(self) -> bool:
+        """Open the connection if needed. Raises ConnectionException while backing off after a failed attempt."""
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            if self.state == ConnectionState.CLOSED:
+                raise ConnectionException(f"Connection {self.key} is closed")
+
+            loop = asyncio.get_running_loop()
+            if self.state == ConnectionState.BACKOFF and loop.time() < self._next_attempt:
+                raise ConnectionException(f"Connection to {self.key} failed, retrying in {self._next_attempt - loop.time():.1f} s")
+
+            if self.state == ConnectionState.CONNECTED:
+                # Lost since the last request
+                _LOGGER.info("Connection to %s lost, reconnecting", self.key)
+                self.reconnects += 1
+                self._client.close()
+
+            _LOGGER.debug("Connecting to %s", self.key)
+            self.state = ConnectionState.CONNECTING
+            try:
+                await self._client.connect()
+            except asyncio.CancelledError:
+                self.state = ConnectionState.DISCONNECTED
+                raise
+            except Exception as err:
+                _LOGGER.debug("Connecting to %s raised: %s", self.key, err)
+
+            if not self._client.connected:
+                self._client.close()
+                self._failed_attempts += 1
+                self.state = ConnectionState.BACKOFF
+                delay = self._backoff_delay()
+                self._next_attempt = loop.time() + delay
+                _LOGGER.warning("Could not connect to %s, retrying in %.1f s", self.key, delay)
+                raise ConnectionException(f"Could not connect to {self.key}")
+
+            self.state = ConnectionState.CONNECTED
+            self._failed_attempts = 0
+            self._configure_socket(self._client)
+            self._scheduler.restore_slots()
+            self._touch()
+            return True
+
+    def _backoff_delay(self) -> float:
+        """Exponential delay with jitter, so devices behind a rebooted gateway don't reconnect in lockstep."""
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_DELAY * 2 ** (self._failed_attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _configure_socket(self, client):
+        """Keepalive and no-delay on TCP sockets, requests are small and latency bound."""
+        transport = getattr(client, "transport", None)
+        sock = transport.get_extra_info("socket") if transport is not None else None
+        if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+            return
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for option, value in (("TCP_KEEPIDLE", KEEPALIVE_IDLE), ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL), ("TCP_KEEPCNT", KEEPALIVE_COUNT)):
+                if hasattr(socket, option):
+                    sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+        except OSError as err:
+            _LOGGER.debug("Could not set socket options on %s: %s", self.key, err)
+
+    def _touch(self):
+        """Restart the idle timer."""
+        if self.idle_timeout is None:
+            return
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = asyncio.get_running_loop().call_later(self.idle_timeout, self._disconnect_idle)
+
+    def _disconnect_idle(self):
+        self._idle_handle = None
+        if self.state == ConnectionState.CONNECTED and self._active == 0:
+            _LOGGER.debug("Closing idle connection to %s", self.key)
+            self.state = ConnectionState.DISCONNECTED
+            self._client.close()
+            self._close_slot_clients()
+
+    @property
+    def max_inflight(self) -> int:
+        return self._scheduler.slots
+
+    def allow_inflight(self, slave: int, max_inflight: int) -> int:
+        """Let a slave have up to max_inflight requests outstanding, returns the effective limit (1 on serial)."""
+        if self._tcp_params is None:
+            if max_inflight > 1:
+                _LOGGER.debug("Overlapping requests are not possible on %s, reading sequentially", self.key)
+            return 1
+
+        # As many clients as the most permissive device on the gateway asks for
+        self._scheduler.set_limit(slave, max_inflight)
+        self._scheduler.slots = max(self._scheduler.slots, max_inflight)
+        return max_inflight
+
+    async def _slot_client(self, slot: int):
+        """Client of a slot, the extra clients are opened on first use and after being idle."""
+        if slot == 0:
+            return self._client
+
+        client = self._slot_clients.get(slot)
+        if client is None:
+            client = AsyncModbusTcpClient(host=self._tcp_params.ip, port=self._tcp_params.port, reconnect_delay=0)
+            self._slot_clients[slot] = client
+        if client.connected:
+            return client
+
+        try:
+            await client.connect()
+        except asyncio.CancelledError:
+            client.close()
+            raise
+        except Exception as err:
+            _LOGGER.debug("Connecting slot %s to %s raised: %s", slot, self.key, err)
+        if not client.connected:
+            client.close()
+            # Many gateways accept only a few connections, the remaining slots carry on
+            _LOGGER.info("%s refused connection %s, fewer requests will overlap", self.key, slot + 1)
+            raise SlotUnavailable(f"Could not open connection {slot + 1} to {self.key}")
+
+        self._configure_socket(client)
+        return client
+
+    def _close_slot_clients(self):
+        for client in self._slot_clients.values():
+            client.close()
+
+    async def execute(self, method: str, slave: int, priority: RequestPriority = RequestPriority.NORMAL,
+                      rtt: RttEstimator | None = None, **kwargs):
+        """Queue a client request for a slave on this connection and wait for the response.
+
+        With an RttEstimator the request is timed out after its current timeout and successful round trips
+        are fed back into it. The timeout starts when the scheduler hands the request to the client of a slot,
+        which sends it right away as no other request is outstanding on it (see ModbusBusScheduler).
+        """
+        if not self.connected:
+            await self.connect()
+
+        async def request(slot: int):
+            client_method = getattr(await self._slot_client(slot), method)
+            if rtt is None:
+                return await client_method(slave=slave, **kwargs)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            try:
+                response = await asyncio.wait_for(client_method(slave=slave, **kwargs), rtt.timeout)
+            except asyncio.TimeoutError:
+                rtt.backoff()
+                raise
+            rtt.add_sample(loop.time() - start)
+            return response
+
+        self._active += 1
+        try:
+            return await self._scheduler.submit(slave, priority, request)
+        finally:
+            self._active -= 1
+            self._touch()
+
+    def close(self):
+        _LOGGER.debug("Closing connection to %s", self.key)
+        self.state = ConnectionState.CLOSED
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        self._scheduler.close()
+        self._client.close()
+        self._close_slot_clients()
+
+class ModbusConnectionPool:
+    """Reference counted connections, keyed by (host, port) or (serial port, baud rate)."""
+
+    def __init__(self):
+        self._connections: dict[tuple, ModbusConnection] = {}
+
+    def acquire(self, connection_params: ConnectionParams) -> ModbusConnection:
+        connection = self._connections.get(connection_params.key)
+        if connection is None:
+            connection = ModbusConnection(connection_params)
+            self._connections[connection.key] = connection
+        connection.refcount += 1
+        _LOGGER.debug("Acquired connection %s (users: %s)", connection.key, connection.refcount)
+        return connection
+
+    def release(self, connection: ModbusConnection):
+        connection.refcount -= 1
+        _LOGGER.debug("Released connection %s (users: %s)", connection.key, connection.refcount)
+        if connection.refcount <= 0:
+            if self._connections.get(connection.key) is connection:
+                del self._connections[connection.key]
+            connection.close()
+
+# Shared by all config entries
+CONNECTION_POOL = ModbusConnectionPool()
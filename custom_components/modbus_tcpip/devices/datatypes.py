@@ -53,13 +53,31 @@ class ModbusPollMode(Enum):
     POLL_ON = 1         # Values will be read each poll interval
     POLL_ONCE = 2       # Just read them once, for example for static configuration
 
+class ModbusValueType(Enum):
+    INT16 = "int16"
+    UINT16 = "uint16"
+    INT32 = "int32"
+    UINT32 = "uint32"
+    FLOAT32 = "float32"
+    FLOAT64 = "float64"
+    STRING = "string"                   # ASCII, 2 characters per register
+    STRING_UTF16 = "string_utf16"       # One character per register
+
+class ModbusEndian(Enum):
+    BIG = "big"
+    LITTLE = "little"
+
 class ModbusGroup:
-    def __init__(self, mode, poll_mode):
+    def __init__(self, mode, poll_mode, interval: Optional[int] = None):
         # Initialize mode and poll_mode
         self.mode = mode
         self.poll_mode = poll_mode
+        # Poll interval in seconds for POLL_ON groups, None follows the device scan interval
+        self.interval = interval
         # Generate a unique ID automatically when the instance is created
         self._unique_id = str(uuid.uuid4())
+        # Groups are dict keys in every lookup, so hash once
+        self._hash = hash((self.mode, self.poll_mode, self._unique_id))
 
     @property
     def unique_id(self):
@@ -73,7 +91,7 @@ class ModbusGroup:
 
     def __hash__(self):
         # Hash based on mode, poll_mode, and unique_id to ensure uniqueness in dict
-        return hash((self.mode, self.poll_mode, self.unique_id))
+        return self._hash
     
 class ModbusDefaultGroups(Enum):
     CONFIG = ModbusGroup(ModbusMode.HOLDING, ModbusPollMode.POLL_OFF)
@@ -91,11 +109,44 @@ class ModbusDefaultGroups(Enum):
     def poll_mode(self):
         return self.value.poll_mode  # Access the poll_mode property directly
 
-@dataclass
+    @property
+    def interval(self):
+        return self.value.interval  # Access the interval property directly
+
+# Registers used by the fixed size value types
+VALUE_TYPE_LENGTH = {
+    ModbusValueType.INT16: 1,
+    ModbusValueType.UINT16: 1,
+    ModbusValueType.INT32: 2,
+    ModbusValueType.UINT32: 2,
+    ModbusValueType.FLOAT32: 2,
+    ModbusValueType.FLOAT64: 4,
+}
+
+@dataclass(slots=True)
 class ModbusDatapoint:
     Address: int = 0                                   # 0-indexed address
     Length: int = 1                                     # Number of registers
     Scaling: float = 1                                  # Multiplier for raw value      
     Value: float = 0                                    # Scaled value
     Attrs: Optional[Dict] = None                        # Dict for attributes
-    DataType: ModbusData = None                         # Entitiy parameters
\ No newline at end of file
+    DataType: ModbusData = None                         # Entitiy parameters
+    Type: ModbusValueType = None                        # None | int16 for 1 register, int32 for 2, one char per register above
+    WordOrder: ModbusEndian = ModbusEndian.BIG          # Register order of multi-register values
+    ByteOrder: ModbusEndian = ModbusEndian.BIG          # Byte order within each register
+
+    def __post_init__(self):
+        # Fixed size types define their own length
+        if self.Type in VALUE_TYPE_LENGTH:
+            self.Length = VALUE_TYPE_LENGTH[self.Type]
+
+    @property
+    def ValueType(self) -> ModbusValueType:
+        """Type used for decoding, inferred from the length if not given."""
+        if self.Type is not None:
+            return self.Type
+        if self.Length == 1:
+            return ModbusValueType.INT16
+        if self.Length == 2:
+            return ModbusValueType.INT32
+        return ModbusValueType.STRING_UTF16
\ No newline at end of file
@@ -0,0 +1,175 @@
+import copy
+import json
+import logging
+import os
+import sys
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from homeassistant.helpers.entity import EntityCategory
+
+from .modbusdevice import ModbusDevice
+from .datatypes import ModbusDatapoint, ModbusGroup, ModbusDefaultGroups, ModbusMode, ModbusPollMode, ModbusValueType, ModbusEndian
+from .datatypes import ModbusSensorData, ModbusNumberData, ModbusSelectData, ModbusBinarySensorData, ModbusSwitchData, ModbusButtonData
+
+_LOGGER = logging.getLogger(__name__)
+
+# DataType "platform" -> entity parameters class
+PLATFORM_DATA_TYPES = {
+    "sensor": ModbusSensorData,
+    "number": ModbusNumberData,
+    "select": ModbusSelectData,
+    "binary_sensor": ModbusBinarySensorData,
+    "switch": ModbusSwitchData,
+    "button": ModbusButtonData,
+}
+
+_GROUP_KEYS = {"mode", "poll_mode", "interval", "datapoints"}
+_DATAPOINT_KEYS = {"Address", "Length", "Scaling", "Type", "WordOrder", "ByteOrder", "DataType"}
+
+class RegisterMapError(ValueError):
+    """A register map file is invalid."""
+
+@dataclass(frozen=True)
+class CompiledRegisterMap:
+    """A validated register map, shared by all devices of the model.
+
+    groups holds (name, group, ((key, datapoint arguments), ...)), validated once so creating
+    a device only copies them into new datapoints.
+    """
+    manufacturer: str | None
+    model: str | None
+    groups: tuple
+
+def load_register_map(path: str) -> dict:
+    """Parse a YAML or JSON register map file."""
+    with open(path, encoding="utf-8") as file:
+        if path.endswith(".json"):
+            spec = json.load(file)
+        else:
+            import yaml
+            spec = yaml.safe_load(file)
+    if not isinstance(spec, dict):
+        raise RegisterMapError(f"{path}: expected a mapping at the top level")
+    return spec
+
+def _enum(enum, value, where: str):
+    try:
+        return enum[str(value).upper()]
+    except KeyError:
+        raise RegisterMapError(f"{where}: {value!r} is not one of {[member.name.lower() for member in enum]}") from None
+
+def _check_keys(spec: dict, allowed: set, where: str):
+    unknown = set(spec) - allowed
+    if unknown:
+        raise RegisterMapError(f"{where}: unknown keys {sorted(unknown)}")
+
+def _compile_data_type(spec: dict, where: str):
+    spec = dict(spec)
+    platform = spec.pop("platform", None)
+    if platform not in PLATFORM_DATA_TYPES:
+        raise RegisterMapError(f"{where}: platform must be one of {list(PLATFORM_DATA_TYPES)}")
+    if "category" in spec:
+        spec["category"] = _enum(EntityCategory, spec["category"], where)
+    if "options" in spec:
+        # JSON keys are always strings
+        spec["options"] = {int(value): label for value, label in spec["options"].items()}
+    try:
+        return PLATFORM_DATA_TYPES[platform](**spec)
+    except TypeError as err:
+        raise RegisterMapError(f"{where}: {err}") from None
+
+def _compile_datapoint(spec: dict, where: str) -> dict:
+    _check_keys(spec, _DATAPOINT_KEYS, where)
+    kwargs = {key: spec[key] for key in ("Address", "Length", "Scaling") if key in spec}
+    if "Type" in spec:
+        try:
+            kwargs["Type"] = ModbusValueType(str(spec["Type"]).lower())
+        except ValueError:
+            raise RegisterMapError(f"{where}: unknown Type {spec['Type']!r}") from None
+    for key in ("WordOrder", "ByteOrder"):
+        if key in spec:
+            kwargs[key] = _enum(ModbusEndian, spec[key], where)
+    if "DataType" in spec:
+        kwargs["DataType"] = _compile_data_type(spec["DataType"], f"{where}.DataType")
+
+    # Fail here, not when the first device is created
+    ModbusDatapoint(**kwargs)
+    return kwargs
+
+def compile_register_map(spec: dict, source: str) -> CompiledRegisterMap:
+    _check_keys(spec, {"manufacturer", "model", "groups"}, source)
+    groups = []
+    for name, group_spec in (spec.get("groups") or {}).items():
+        where = f"{source}: groups.{name}"
+        _check_keys(group_spec, _GROUP_KEYS, where)
+        if name in ModbusDefaultGroups.__members__:
+            group = ModbusDefaultGroups[name]
+        else:
+            group = ModbusGroup(_enum(ModbusMode, group_spec.get("mode", "none"), where),
+                                _enum(ModbusPollMode, group_spec.get("poll_mode", "poll_off"), where),
+                                interval=group_spec.get("interval"))
+        datapoints = tuple((key, _compile_datapoint(datapoint_spec or {}, f"{where}.{key}"))
+                           for key, datapoint_spec in (group_spec.get("datapoints") or {}).items())
+        groups.append((name, group, datapoints))
+    return CompiledRegisterMap(spec.get("manufacturer"), spec.get("model"), tuple(groups))
+
+@lru_cache(maxsize=None)
+def compile_register_map_file(path: str) -> CompiledRegisterMap:
+    """Compiled once per file and run."""
+    return compile_register_map(load_register_map(path), os.path.basename(path))
+
+class DeclarativeDevice(ModbusDevice):
+    """A device whose groups and datapoints come from a register map.
+
+    Subclasses set REGISTER_MAP to a YAML/JSON file (relative to their module) or a dict, and can
+    still implement onBeforeRead, onAfterRead etc. Groups are available as class attributes by name.
+    """
+    REGISTER_MAP = None
+    _registerMap: CompiledRegisterMap = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register_map = vars(cls).get("REGISTER_MAP")
+        if register_map is None:
+            return
+
+        # Compiled when the driver is imported, which happens outside the event loop
+        if isinstance(register_map, dict):
+            cls._registerMap = compile_register_map(register_map, cls.__qualname__)
+        else:
+            if not os.path.isabs(register_map):
+                register_map = os.path.join(os.path.dirname(sys.modules[cls.__module__].__file__), register_map)
+            cls._registerMap = compile_register_map_file(register_map)
+
+        for name, group, _ in cls._registerMap.groups:
+            if not isinstance(group, ModbusDefaultGroups):
+                setattr(cls, name, group)
+
+    def __init__(self, connection_params):
+        super().__init__(connection_params)
+
+        register_map = self._registerMap
+        if register_map.manufacturer is not None:
+            self.manufacturer = register_map.manufacturer
+        if register_map.model is not None:
+            self.model = register_map.model
+
+        for _, group, datapoints in register_map.groups:
+            self.Datapoints.setdefault(group, {}).update((key, self._createDatapoint(kwargs)) for key, kwargs in datapoints)
+
+        _LOGGER.debug("Loaded datapoints for %s %s", self.manufacturer, self.model)
+
+    @staticmethod
+    def _createDatapoint(kwargs: dict) -> ModbusDatapoint:
+        # Hooks may adjust entity parameters (e.g. units) per device, so each device gets its own copy
+        data_type = kwargs.get("DataType")
+        if data_type is None:
+            return ModbusDatapoint(**kwargs)
+        return ModbusDatapoint(**{**kwargs, "DataType": copy.copy(data_type)})
+
+def device_class_from_file(path: str, driver_name: str) -> type:
+    """Device class for a data file driver."""
+    return type("Device", (DeclarativeDevice,), {"REGISTER_MAP": path, "__module__": __name__,
+                                                 "__qualname__": f"Device[{driver_name}]"})
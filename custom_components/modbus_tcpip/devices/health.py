@@ -0,0 +1,108 @@
+import logging
+import time
+
+from contextlib import contextmanager
+from enum import Enum
+
+_LOGGER = logging.getLogger(__name__)
+
+# Request timeout bounds, the estimate is clamped to these
+MIN_REQUEST_TIMEOUT: float = 0.5  # Seconds
+MAX_REQUEST_TIMEOUT: float = 10.0  # Seconds
+INITIAL_REQUEST_TIMEOUT: float = 3.0  # Seconds, until the first response has been timed
+
+# Circuit breaker
+BREAKER_FAILURE_THRESHOLD: int = 3  # Consecutive failed requests
+BREAKER_PROBE_INTERVAL: float = 10.0  # Seconds, doubled after every failed probe
+BREAKER_MAX_PROBE_INTERVAL: float = 300.0  # Seconds
+
+class RttEstimator:
+    """Request timeout from the smoothed round trip time and its variation (RFC 6298).
+
+    Only successful requests are sampled. A timeout doubles the current timeout until the
+    next sample, so a slow but working device isn't timed out over and over.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+        self._timeout = INITIAL_REQUEST_TIMEOUT
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    def add_sample(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self._timeout = min(MAX_REQUEST_TIMEOUT, max(MIN_REQUEST_TIMEOUT, self.srtt + 4 * self.rttvar))
+
+    def backoff(self):
+        self._timeout = min(MAX_REQUEST_TIMEOUT, self._timeout * 2)
+
+class BreakerState(Enum):
+    CLOSED = "closed"           # Normal operation
+    OPEN = "open"               # Device considered offline, polls fail fast
+    HALF_OPEN = "half_open"     # Probing
+
+class CircuitBreaker:
+    """Stops polling an unresponsive device, and lets a probe through at increasing intervals."""
+
+    def __init__(self):
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._probe_interval = BREAKER_PROBE_INTERVAL
+        self._next_probe = 0.0
+        self._suspended = 0
+
+    @contextmanager
+    def suspended(self):
+        """Failures inside are expected (e.g. while probing limits of the device) and don't count."""
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    @property
+    def next_probe_in(self) -> float:
+        return max(0.0, self._next_probe - time.monotonic())
+
+    def allow_poll(self) -> bool:
+        """True if polling may proceed. When a probe is due the breaker goes half open and the caller probes."""
+        if self.state == BreakerState.CLOSED:
+            return True
+        if self.state == BreakerState.OPEN and time.monotonic() >= self._next_probe:
+            self.state = BreakerState.HALF_OPEN
+        return False
+
+    def record_success(self):
+        if self.state != BreakerState.CLOSED:
+            _LOGGER.info("Device responding again, resuming polling")
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._probe_interval = BREAKER_PROBE_INTERVAL
+
+    def record_failure(self):
+        if self._suspended:
+            return
+        self.failures += 1
+        if self.state == BreakerState.HALF_OPEN:
+            self._open(min(self._probe_interval * 2, BREAKER_MAX_PROBE_INTERVAL))
+        elif self.state == BreakerState.CLOSED and self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.trips += 1
+            _LOGGER.warning("Device not responding after %s failed requests, pausing polling", self.failures)
+            self._open(BREAKER_PROBE_INTERVAL)
+
+    def _open(self, interval: float):
+        self.state = BreakerState.OPEN
+        self._probe_interval = interval
+        self._next_probe = time.monotonic() + interval
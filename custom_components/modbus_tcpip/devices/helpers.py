@@ -1,48 +1,213 @@
+import ast
 import asyncio
 import logging
 import os
 
+from dataclasses import dataclass, field
 from importlib import import_module
 
 _LOGGER = logging.getLogger(__name__)
 
+# Path to the "devices" folder
+DEVICES_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Drivers defined as register maps instead of Python modules (see declarative.py)
+DATA_FILE_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# Entity platform of each datapoint data type, for the capabilities of a driver
+_DATA_TYPE_PLATFORMS = {
+    "ModbusSensorData": "sensor",
+    "ModbusNumberData": "number",
+    "ModbusSelectData": "select",
+    "ModbusBinarySensorData": "binary_sensor",
+    "ModbusSwitchData": "switch",
+    "ModbusButtonData": "button",
+}
+
+@dataclass
+class DriverInfo:
+    """What the driver index knows about a driver, without importing it."""
+    name: str                                               # e.g. "Trox.TVE", as passed to load_device_class
+    path: str
+    manufacturer: str | None = None
+    model: str | None = None
+    capabilities: list[str] = field(default_factory=list)   # Entity platforms the driver creates
+    base: str | None = None                                 # Driver this one extends, if any
+
+    @property
+    def label(self) -> str:
+        """Name shown when selecting a driver, e.g. "Swegon CASA (Swegon.CASA_R4) - number, sensor"."""
+        title = " ".join(part for part in (self.manufacturer, self.model) if part)
+        label = f"{title} ({self.name})" if title else self.name
+        if self.capabilities:
+            label += " - " + ", ".join(self.capabilities)
+        return label
+
+# Driver index, rebuilt when a driver directory changes (files added, removed or renamed)
+_driver_index: dict[str, DriverInfo] = {}
+_driver_index_key = None
+
+# Loaded driver classes, shared by all entries using the same model
+_device_classes: dict[str, type] = {}
+_loading: dict[str, asyncio.Task] = {}
+
 async def get_available_drivers():
-    # Get the base path to the "devices" folder
-    base_path = os.path.dirname(os.path.abspath(__file__))  # Path to "devices/helpers.py"
+    return list((await get_driver_index()).keys())
+
+async def get_driver_index() -> dict[str, DriverInfo]:
+    # Offload the blocking file system access to a separate thread
+    return await asyncio.to_thread(_get_driver_index, DEVICES_PATH)
 
-    # Offload the blocking os.walk() operation to a separate thread
-    return await asyncio.to_thread(scan_drivers, base_path)
+def _get_driver_index(base_path) -> dict[str, DriverInfo]:
+    global _driver_index, _driver_index_key
 
-def scan_drivers(base_path):
+    key = _index_key(base_path, _driver_index)
+    if key != _driver_index_key:
+        _driver_index = {info.name: info for info in scan_drivers(base_path)}
+        # Subdirectories may have changed with the rescan
+        _driver_index_key = _index_key(base_path, _driver_index)
+        _LOGGER.debug("Indexed %s drivers", len(_driver_index))
+    return _driver_index
+
+def _index_key(base_path, index) -> tuple:
+    """Modification times of the devices folder and the driver folders in the index."""
+    folders = {base_path} | {os.path.dirname(info.path) for info in index.values()}
+    key = []
+    for folder in sorted(folders):
+        try:
+            key.append((folder, os.stat(folder).st_mtime_ns))
+        except OSError:
+            key.append((folder, None))
+    return tuple(key)
+
+def scan_drivers(base_path) -> list[DriverInfo]:
     drivers = []
-    for root, _, files in os.walk(base_path):
+    for root, dirs, files in os.walk(base_path):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
         if root == base_path:  # Skip files in the "devices/" root directory
             continue
         for file in files:
             if file.endswith(".py") and file != "__init__.py":
-                # Create the module path relative to the "devices/" folder
-                relative_path = os.path.relpath(os.path.join(root, file), base_path)
-                driver_path = relative_path.replace(os.sep, ".").rstrip(".py")
-                drivers.append(driver_path)
+                parse = parse_driver
+            elif file.endswith(DATA_FILE_EXTENSIONS):
+                parse = parse_data_driver
+            else:
+                continue
+            # Create the module path relative to the "devices/" folder
+            path = os.path.join(root, file)
+            relative_path = os.path.splitext(os.path.relpath(path, base_path))[0]
+            drivers.append(parse(relative_path.replace(os.sep, "."), path))
+
+    # Drivers extending another driver inherit what they don't set themselves
+    by_name = {info.name: info for info in drivers}
+    for info in drivers:
+        base, seen = by_name.get(info.base), {info.name}
+        while base is not None and base.name not in seen:
+            seen.add(base.name)
+            info.manufacturer = info.manufacturer or base.manufacturer
+            info.model = info.model or base.model
+            info.capabilities = sorted(set(info.capabilities) | set(base.capabilities))
+            base = by_name.get(base.base)
     return drivers
 
+def parse_driver(name: str, path: str) -> DriverInfo:
+    """Read manufacturer, model and capabilities from the driver source."""
+    info = DriverInfo(name=name, path=path)
+    try:
+        with open(path, encoding="utf-8") as file:
+            tree = ast.parse(file.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as err:
+        _LOGGER.warning("Could not parse driver %s: %s", name, err)
+        return info
+
+    capabilities = set()
+    for node in ast.walk(tree):
+        # self.manufacturer = "..." / self.model = "..." (the first assignment is the static value)
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self":
+                    if target.attr == "manufacturer" and info.manufacturer is None:
+                        info.manufacturer = node.value.value
+                    elif target.attr == "model" and info.model is None:
+                        info.model = node.value.value
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _DATA_TYPE_PLATFORMS:
+            capabilities.add(_DATA_TYPE_PLATFORMS[node.func.id])
+        # from .CASA_R4 import Device as BaseDevice
+        elif isinstance(node, ast.ImportFrom) and node.level == 1 and node.module and any(alias.name == "Device" for alias in node.names):
+            info.base = name.rsplit(".", 1)[0] + "." + node.module
+
+    info.capabilities = sorted(capabilities)
+    return info
+
+def parse_data_driver(name: str, path: str) -> DriverInfo:
+    """Read manufacturer, model and capabilities from a register map file."""
+    from .declarative import load_register_map
+
+    info = DriverInfo(name=name, path=path)
+    try:
+        spec = load_register_map(path)
+    except Exception as err:
+        _LOGGER.warning("Could not parse driver %s: %s", name, err)
+        return info
+
+    info.manufacturer = spec.get("manufacturer")
+    info.model = spec.get("model")
+    info.capabilities = sorted({
+        datapoint["DataType"]["platform"]
+        for group in (spec.get("groups") or {}).values() if isinstance(group, dict)
+        for datapoint in (group.get("datapoints") or {}).values()
+        if isinstance(datapoint, dict) and isinstance(datapoint.get("DataType"), dict) and "platform" in datapoint["DataType"]
+    })
+    return info
+
+def find_data_driver(driver_name) -> str | None:
+    """Path of the register map file of a driver, None if it's a Python driver."""
+    base_path = os.path.join(DEVICES_PATH, *driver_name.split("."))
+    for extension in DATA_FILE_EXTENSIONS:
+        if os.path.isfile(base_path + extension):
+            return base_path + extension
+    return None
+
 async def load_device_class(driver_name):
+    """Driver class by name, each driver is imported once and shared. Returns None if it can't be loaded."""
+    device_class = _device_classes.get(driver_name)
+    if device_class is not None:
+        return device_class
+
+    # Entries using the same driver wait for one import
+    task = _loading.get(driver_name)
+    if task is None:
+        task = asyncio.ensure_future(_import_device_class(driver_name))
+        _loading[driver_name] = task
+        task.add_done_callback(lambda _: _loading.pop(driver_name, None))
+    device_class = await asyncio.shield(task)
+
+    if device_class is not None:
+        _device_classes[driver_name] = device_class
+    return device_class
+
+async def _import_device_class(driver_name):
     # Define the base package path
     base_package = "custom_components.modbus_tcpip"  # Your custom integration package path
-    
+
     # Create the module path (e.g., "devices.Trox.TVE")
     module_path = f".devices.{driver_name}"
 
     try:
+        # Register map drivers are compiled into a class
+        data_file = await asyncio.to_thread(find_data_driver, driver_name)
+        if data_file is not None:
+            from .declarative import device_class_from_file
+            return await asyncio.to_thread(device_class_from_file, data_file, driver_name)
+
         # Dynamically import the module
-        #driver_module = importlib.import_module(module_path, package=base_package)
         driver_module = await asyncio.to_thread(import_module, module_path, base_package)
 
         # Load tye class named 'Device' in the module
         device_class = getattr(driver_module, 'Device')
-        
+
         return device_class
-        
+
     except AttributeError as e:
         # If the 'Device' class is not found in the module, print the error
         _LOGGER.debug(f"AttributeError: {e} - Class 'Device' not found in {module_path}")
@@ -54,4 +219,4 @@ async def load_device_class(driver_name):
     except Exception as e:
         # Handle any other exceptions that may arise
         _LOGGER.debug(f"Error: {e} while loading module {module_path}")
-        return None
\ No newline at end of file
+        return None
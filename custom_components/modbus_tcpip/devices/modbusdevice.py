@@ -1,36 +1,89 @@
+import asyncio
 import logging
+import time
 
 from dataclasses import dataclass
 from typing import Dict
 
 from homeassistant.helpers.entity import EntityCategory
 
-from pymodbus.client import AsyncModbusTcpClient, AsyncModbusSerialClient
-from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ModbusException, ModbusIOException
 
-from .connection import ConnectionParams, TCPConnectionParams, RTUConnectionParams
+from .connection import ConnectionParams
+from .busscheduler import RequestPriority
+from .connectionpool import CONNECTION_POOL
 
 from .datatypes import ModbusMode, ModbusPollMode, ModbusDefaultGroups, ModbusGroup, ModbusDatapoint
 from .datatypes import ModbusSelectData, ModbusNumberData
+from .codec import decode_value, encode_value
+from .readplanner import ModbusReadBlock, plan_reads, MAX_READ_REGISTERS
+from .stats import ModbusDeviceStats
+from .health import RttEstimator, CircuitBreaker, BreakerState
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_MAX_READ_GAP: int = 10
+DEFAULT_CONFIG_CACHE_TTL: float = 300.0  # Seconds
+DEFAULT_READ_MAX_AGE: float = 0.0  # Seconds, 0 only shares reads in flight
+
+# Protocol limit for FC16 (Modbus Application Protocol v1.1b3, 6.12)
+MAX_WRITE_REGISTERS: int = 123
+
+# Protocol limits for FC1/FC2 and FC15 (6.1, 6.2, 6.11)
+MAX_READ_BITS: int = 2000
+MAX_WRITE_BITS: int = 1968
+
+# Register type -> (client read method, most registers or bits per request)
+RAW_READ_METHODS = {
+    "holding": ("read_holding_registers", MAX_READ_REGISTERS),
+    "input": ("read_input_registers", MAX_READ_REGISTERS),
+    "coil": ("read_coils", MAX_READ_BITS),
+    "discrete_input": ("read_discrete_inputs", MAX_READ_BITS),
+}
+
+# Register type -> (client method for one value, for several values, most values per request)
+RAW_WRITE_METHODS = {
+    "holding": ("write_register", "write_registers", MAX_WRITE_REGISTERS),
+    "coil": ("write_coil", "write_coils", MAX_WRITE_BITS),
+}
+
+# Exception codes for registers the device doesn't have, and for requests it can't handle (e.g. too many registers)
+ILLEGAL_DATA_ADDRESS: int = 2
+ILLEGAL_DATA_VALUE: int = 3
+
+# Attempts per size before a silent block size probe read counts as a rejection
+BLOCK_PROBE_ATTEMPTS: int = 2
+
+class ModbusExceptionResponse(ModbusException):
+    """The device answered a request with a Modbus exception."""
+
+    def __init__(self, message: str, exception_code: int | None):
+        super().__init__(message)
+        self.exception_code = exception_code
+
 class InitHelper(type):
     def __call__(cls, *args, **kwargs):
-        instance = super().__call__(*args, **kwargs)
-        instance.post_init()
+        instance = cls.__new__(cls, *args, **kwargs)
+        try:
+            instance.__init__(*args, **kwargs)
+            instance.post_init()
+        except BaseException:
+            # A driver failing to set up must not keep its pooled connection
+            connection = getattr(instance, "_connection", None)
+            if connection is not None:
+                CONNECTION_POOL.release(connection)
+                instance._connection = None
+            raise
         return instance
 
 class ModbusDevice(metaclass=InitHelper):
     def __init__(self, connection_params: ConnectionParams):
-        if isinstance(connection_params, TCPConnectionParams):
-            self._client = AsyncModbusTcpClient(host=connection_params.ip, port=connection_params.port)
-        elif isinstance(connection_params, RTUConnectionParams):
-            self._client = AsyncModbusSerialClient(port=connection_params.serial_port, baudrate=connection_params.baud_rate)
-        else:
-            raise ValueError("Unsupported connection parameters")
-
+        # Devices on the same gateway / serial port share one connection
+        self._connection = CONNECTION_POOL.acquire(connection_params)
         self._slave_id = connection_params.slave_id
+
+        # Number of requests this device may have outstanding at once (TCP only)
+        self.max_inflight_requests = self._connection.allow_inflight(self._slave_id, getattr(connection_params, "max_inflight", 1))
         
         # Default properties
         self.manufacturer = None
@@ -45,6 +98,58 @@ class ModbusDevice(metaclass=InitHelper):
         self.Datapoints[ModbusDefaultGroups.CONFIG] = { }
         self.Datapoints[ModbusDefaultGroups.UI] = { }
 
+        # Read planning, holes of up to max_read_gap registers are read and discarded
+        # to save a request. Drivers may override these in their __init__.
+        self.max_read_gap = DEFAULT_MAX_READ_GAP
+        self.max_read_registers = MAX_READ_REGISTERS
+        self._readPlans: Dict[tuple, list[ModbusReadBlock]] = {}
+
+        # Largest read the device accepts per register type, probed on the first read unless disabled
+        self.probe_block_size = True
+        self.block_limits: Dict[ModbusMode, int] = {}
+        self._blockSizeProbed = False
+
+        # Registers the device rejected with an illegal address exception, per mode. Left out of read plans.
+        self.quarantine: Dict[ModbusMode, set[int]] = {}
+
+        # Opt in to hold writes back while another write is in flight, then send them together, keeping the last
+        # value per register and merging adjacent registers into one request (FC16, which some devices reject)
+        self.coalesce_writes = False
+        self._pendingWrites: Dict[int, int] = {}
+        self._pendingWriters: list[tuple[int, int, asyncio.Future]] = []
+        self._flushTask = None
+
+        # The CONFIG group is read as a whole when first needed and kept for config_cache_ttl seconds
+        self.config_cache_ttl = DEFAULT_CONFIG_CACHE_TTL
+        self._configReadAt = None
+        self._configLock = asyncio.Lock()
+
+        # Reads covered by a read in flight (or one younger than read_max_age) share its response
+        self.read_max_age = DEFAULT_READ_MAX_AGE
+        self._inflightReads: Dict[tuple, asyncio.Task] = {}
+        self._recentReads: list[tuple] = []
+        self._writeCount = 0
+        self.coalescedReads = 0
+
+        # Flat table of all datapoints, entities resolve their integer handle once
+        self._handles: list[ModbusDatapoint] = []
+        self._handleIndex: Dict[tuple, int] = {}
+
+        # Last (Value, Attrs) handed out per handle, for change detection
+        self._published: list[tuple] = []
+
+        # Request statistics per group, requests that failed last time count as retries when sent again
+        self.stats = ModbusDeviceStats()
+        self._failedRequests: set[tuple] = set()
+        self._groupNames: Dict[ModbusGroup, str] = {}
+
+        # Request timeouts follow the measured round trip time, and polling pauses while the device doesn't respond
+        self.rtt = RttEstimator()
+        self.breaker = CircuitBreaker()
+
+        # POLL_ONCE values restored from a snapshot, the first read then skips them
+        self.pollOnceRestored = False
+
         self.firstRead = True
     
     def post_init(self):
@@ -55,6 +160,12 @@ class ModbusDevice(metaclass=InitHelper):
                 "Config Value": ModbusDatapoint(DataType=ModbusNumberData(category=EntityCategory.CONFIG, min_value=0, max_value=65535, step=1))
             }
 
+        self._updateHandles()
+
+        # Plan the poll requests once, now that the driver has defined its datapoints
+        self.getReadPlan(self.getPollGroups(firstRead=True))
+        self.getReadPlan(self.getPollGroups(firstRead=False))
+
     """ ******************************************************* """
     """ ************* FUNCTIONS CALLED ON EVENTS ************** """
     """ ******************************************************* """
@@ -66,68 +177,512 @@ class ModbusDevice(metaclass=InitHelper):
         pass
 
     """ ******************************************************* """
-    """ *********** EXTERNAL CALL TO READ ALL DATA ************ """
+    """ ******************** CONNECTION *********************** """
     """ ******************************************************* """
-    async def readData(self):
-        if self.firstRead:      
-            await self._client.connect() 
+    @property
+    def _client(self):
+        return self._connection.client
 
-        self.onBeforeRead()
+    async def _execute(self, method: str, priority: RequestPriority = RequestPriority.NORMAL, labels: tuple = (), **kwargs):
+        """Send a request for this slave through the shared connection, recording it in stats under labels."""
+        request = (method, kwargs.get("address"), kwargs.get("count"))
+        registers = kwargs.get("count") or len(kwargs.get("values") or ()) or 1
+        retry = request in self._failedRequests
 
+        start = time.perf_counter()
         try:
-            for group, datapoints in self.Datapoints.items():
-                if group.poll_mode == ModbusPollMode.POLL_ON:
-                    await self.readGroup(group)
-                elif group.poll_mode == ModbusPollMode.POLL_ONCE and self.firstRead:
-                    await self.readGroup(group)
-        except Exception as err:
+            response = await self._connection.execute(method, self._slave_id, priority, self.rtt, **kwargs)
+        except (ModbusIOException, asyncio.TimeoutError):
+            self._failedRequests.add(request)
+            self.stats.record(labels, time.perf_counter() - start, registers, retry=retry, timeout=True)
+            self.breaker.record_failure()
+            raise
+        except ModbusException:
+            self._failedRequests.add(request)
+            self.stats.record(labels, time.perf_counter() - start, registers, retry=retry, error=True)
+            self.breaker.record_failure()
             raise
 
+        # Any response, including an exception response, shows the device is alive
+        self.breaker.record_success()
+
+        exception_code = getattr(response, "exception_code", None) if response.isError() else None
+        if response.isError():
+            self._failedRequests.add(request)
+        else:
+            self._failedRequests.discard(request)
+        self.stats.record(labels, time.perf_counter() - start, registers, retry=retry,
+                          exception_code=exception_code, error=response.isError())
+        return response
+
+    def groupName(self, group: ModbusGroup) -> str:
+        """Name of a group as defined in the driver (e.g. GROUP_SENSORS), for logs and statistics."""
+        name = self._groupNames.get(group)
+        if name is None:
+            if isinstance(group, ModbusDefaultGroups):
+                name = group.name
+            else:
+                name = next((attr for cls in type(self).__mro__ for attr, value in vars(cls).items() if value is group), group.unique_id)
+            self._groupNames[group] = name
+        return name
+
+    def getGroupsAt(self, mode: ModbusMode, address: int, count: int) -> set[ModbusGroup]:
+        """Groups read from the device (polled, or CONFIG) with datapoints overlapping count registers from address.
+
+        Other POLL_OFF groups hold values calculated by the driver, usually at the default address 0.
+        """
+        return {group for group, datapoints in self.Datapoints.items() if group.mode == mode
+                and (group.poll_mode != ModbusPollMode.POLL_OFF or group == ModbusDefaultGroups.CONFIG)
+                for datapoint in datapoints.values()
+                if datapoint.Address < address + count and address < datapoint.Address + datapoint.Length}
+
+    def getGroup(self, name: str) -> ModbusGroup | None:
+        """Group by its name as returned by groupName."""
+        return next((group for group in self.Datapoints if self.groupName(group) == name), None)
+
+    def close(self):
+        """Give the connection back to the pool, closing it if this was the last user."""
+        if self._flushTask is not None:
+            self._flushTask.cancel()
+            self._flushTask = None
+            for _, _, future in self._pendingWriters:
+                if not future.done():
+                    future.set_exception(ModbusException("Device closed before pending writes were sent"))
+            self._pendingWrites, self._pendingWriters = {}, []
+
+        for task in self._inflightReads.values():
+            task.cancel()
+        self._inflightReads.clear()
+        self._recentReads.clear()
+
+        if self._connection is not None:
+            CONNECTION_POOL.release(self._connection)
+            self._connection = None
+
+    """ ******************************************************* """
+    """ *********** EXTERNAL CALL TO READ ALL DATA ************ """
+    """ ******************************************************* """
+    async def readData(self, groups: list[ModbusGroup] | None = None):
+        """Read all polled groups, or only the given ones. The first read always covers all groups."""
+        if groups is None or self.firstRead:
+            groups = self.getPollGroups(firstRead=self.firstRead and not self.pollOnceRestored)
+
+        if not self.breaker.allow_poll():
+            if self.breaker.state != BreakerState.HALF_OPEN or not await self._probe():
+                raise ModbusException(f"Device not responding, next probe in {self.breaker.next_probe_in:.0f} s")
+
+        if self.probe_block_size and not self._blockSizeProbed:
+            # Only marked done when complete, an interrupted probe runs again on the next read
+            await self._probeBlockSizes()
+            self._blockSizeProbed = True
+
+        self.onBeforeRead()
+
+        await self._readBlocks(self.getReadPlan(groups))
+
         if self.firstRead:      
             self.onAfterFirstRead()
             self.firstRead = False
 
         self.onAfterRead()
 
+    async def _probe(self) -> bool:
+        """Cheap health check while the breaker is open: read the first register of the poll plan."""
+        plan = self.getReadPlan(self.getPollGroups())
+        if len(plan) > 0:
+            try:
+                await self._readRegisters(plan[0].mode, plan[0].address, 1, labels=("PROBE",), coalesce=False)
+            except Exception as err:
+                _LOGGER.debug("Probe failed: %s", err)
+        else:
+            self.breaker.record_success()
+        return self.breaker.state == BreakerState.CLOSED
+
+    def getPollGroups(self, firstRead: bool | None = None) -> list[ModbusGroup]:
+        """Groups to be read by readData, for the next call unless firstRead is given."""
+        if firstRead is None:
+            firstRead = self.firstRead
+
+        groups = []
+        for group in self.Datapoints:
+            if group.poll_mode == ModbusPollMode.POLL_ON:
+                groups.append(group)
+            elif group.poll_mode == ModbusPollMode.POLL_ONCE and firstRead:
+                groups.append(group)
+        return groups
+
+    """ ******************************************************* """
+    """ ********************* SNAPSHOTS *********************** """
+    """ ******************************************************* """
+    def getSnapshot(self) -> dict:
+        """POLL_ONCE values and device information, JSON serializable, for restoring after a restart."""
+        values = {}
+        for group, datapoints in self.Datapoints.items():
+            if group.poll_mode == ModbusPollMode.POLL_ONCE:
+                values[self.groupName(group)] = {key: datapoint.Value for key, datapoint in datapoints.items()}
+        return {
+            "values": values,
+            "manufacturer": self.manufacturer,
+            "model": self.model,
+            "sw_version": self.sw_version,
+            "serial_number": self.serial_number,
+        }
+
+    def restoreSnapshot(self, snapshot: dict) -> bool:
+        """Restore a snapshot taken by getSnapshot. Only used if it covers every POLL_ONCE datapoint, and there are some."""
+        values = snapshot.get("values", {})
+        restored = []
+        for group, datapoints in self.Datapoints.items():
+            if group.poll_mode != ModbusPollMode.POLL_ONCE:
+                continue
+            group_values = values.get(self.groupName(group), {})
+            if any(key not in group_values for key in datapoints):
+                _LOGGER.debug("Snapshot doesn't match the datapoints of %s, reading it from the device", self.groupName(group))
+                return False
+            restored.extend((datapoint, group_values[key]) for key, datapoint in datapoints.items())
+        if not restored:
+            # Nothing is skipped on the first read, so there is nothing to revalidate either
+            return False
+
+        for datapoint, value in restored:
+            datapoint.Value = value
+        for attr in ("manufacturer", "model", "sw_version", "serial_number"):
+            if snapshot.get(attr) is not None:
+                setattr(self, attr, snapshot[attr])
+        self.pollOnceRestored = True
+        return True
+
+    async def refreshPollOnce(self):
+        """Read the POLL_ONCE groups again, e.g. to revalidate restored values."""
+        groups = [group for group in self.Datapoints if group.poll_mode == ModbusPollMode.POLL_ONCE]
+        if len(groups) > 0:
+            await self._readBlocks(self.getReadPlan(groups))
+            self.onAfterFirstRead()
+        self.pollOnceRestored = False
+
+    """ ******************************************************* """
+    """ ********************* READ PLAN *********************** """
+    """ ******************************************************* """
+    def getReadPlan(self, groups) -> list[ModbusReadBlock]:
+        """Minimal set of read requests covering all datapoints in groups, cached per group set."""
+        plan_key = tuple(groups)
+        plan = self._readPlans.get(plan_key)
+        if plan is None:
+            datapoints = ((group, key, datapoint) for group in groups for key, datapoint in self.Datapoints[group].items())
+            plan = plan_reads(datapoints, max_gap=self.max_read_gap, max_count=self.max_read_registers, excluded=self.quarantine,
+                              mode_max_count=self.block_limits)
+            self._readPlans[plan_key] = plan
+        return plan
+
+    def invalidateReadPlans(self):
+        """Call if datapoints are added or moved after the device was set up."""
+        self._readPlans.clear()
+
+    """ ******************************************************* """
+    """ ****************** BLOCK SIZE PROBE ******************* """
+    """ ******************************************************* """
+    async def _probeBlockSizes(self):
+        """Find the largest read each register type accepts, if smaller than the largest planned request."""
+        largest = {}
+        for block in self.getReadPlan(self.getPollGroups(firstRead=True)):
+            if block.count > largest.get(block.mode, (0, 0))[1]:
+                largest[block.mode] = (block.address, block.count)
+
+        with self.breaker.suspended():
+            for mode, (address, count) in largest.items():
+                if count <= 1 or await self._acceptsRead(mode, address, count):
+                    continue
+                if not await self._acceptsRead(mode, address, 1):
+                    raise ModbusException(f"Device does not answer {mode.name} reads at address {address}")
+
+                # Largest accepted count is in [low, high]
+                low, high = 1, count - 1
+                while low < high:
+                    middle = (low + high + 1) // 2
+                    if await self._acceptsRead(mode, address, middle):
+                        low = middle
+                    else:
+                        high = middle - 1
+
+                # Datapoints longer than this are read in parts, see _readRange
+                _LOGGER.info("Device accepts at most %s %s registers per read", low, mode.name)
+                self.block_limits[mode] = low
+                self.invalidateReadPlans()
+
+    async def _acceptsRead(self, mode: ModbusMode, address: int, count: int) -> bool:
+        """True if the device answers a read of count registers, raises if it stops answering altogether."""
+        for attempt in range(BLOCK_PROBE_ATTEMPTS):
+            try:
+                await self._readRegisters(mode, address, count, labels=("PROBE",), coalesce=False)
+            except ModbusExceptionResponse as err:
+                # Other exceptions (e.g. a missing register) show the size itself was accepted
+                return err.exception_code != ILLEGAL_DATA_VALUE
+            except (ModbusIOException, asyncio.TimeoutError):
+                continue
+            return True
+
+        # Some devices drop requests that are too large, tell that apart from a device that went quiet
+        if count > 1 and await self._acceptsRead(mode, address, 1):
+            return False
+        raise ModbusIOException(f"Device stopped answering while probing {mode.name} read sizes")
+
     """ ******************************************************* """
     """ ******************** READ GROUP *********************** """
     """ ******************************************************* """
     async def readGroup(self, group: ModbusGroup):
         """Read Modbus group registers and update data points."""
-
-        # Calculate the total number of registers to read
-        n_reg = sum(point.Length for point in self.Datapoints[group].values())
-        if n_reg == 0:
+        plan = self.getReadPlan([group])
+        if len(plan) == 0:
             _LOGGER.warning("No data points to read in group: %s", self.Datapoints[group])
             return
 
-        first_key = next(iter(self.Datapoints[group]))
-        first_address = self.Datapoints[group][first_key].Address
+        await self._readBlocks(plan)
+
+    async def _readBlocks(self, blocks: list[ModbusReadBlock], priority: RequestPriority = RequestPriority.NORMAL):
+        if self.max_inflight_requests <= 1 or len(blocks) <= 1:
+            for block in blocks:
+                await self._readBlock(block, priority)
+            return
+
+        # Overlapped: keep up to max_inflight_requests reads outstanding, each on its own client
+        semaphore = asyncio.Semaphore(self.max_inflight_requests)
 
-        # Read the appropriate type of registers
+        async def read(block):
+            async with semaphore:
+                await self._readBlock(block, priority)
+
+        tasks = [asyncio.ensure_future(read(block)) for block in blocks]
         try:
-            if group.mode == ModbusMode.INPUT:
-                response = await self._client.read_input_registers(address=first_address, count=n_reg, slave=self._slave_id)
-            elif group.mode == ModbusMode.HOLDING:
-                response = await self._client.read_holding_registers(address=first_address, count=n_reg, slave=self._slave_id)
-            else:
-                raise ValueError(f"Unsupported Modbus mode: {group.mode}")
-        except Exception as err:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
             raise
 
+    async def _readBlock(self, block: ModbusReadBlock, priority: RequestPriority = RequestPriority.NORMAL):
+        labels = tuple(dict.fromkeys(self.groupName(point[1]) for point in block.points))
+        try:
+            registers = await self._readRange(block.mode, block.address, block.count, priority, labels)
+        except ModbusExceptionResponse as err:
+            if err.exception_code != ILLEGAL_DATA_ADDRESS:
+                raise
+            await self._quarantineIllegal(block, labels, err)
+            return
+
+        # Decode the whole response at once, values are in the same order as the points
+        values = block.codec.decode(registers)
+        for (offset, group, key, datapoint), value in zip(block.points, values):
+            datapoint.Value = self.scale_value(value, datapoint.Scaling)
+
+    async def _readRange(self, mode: ModbusMode, address: int, count: int,
+                         priority: RequestPriority = RequestPriority.NORMAL, labels: tuple = ()) -> list:
+        """Read count registers, in parts if a single datapoint is longer than the probed block limit."""
+        limit = self.block_limits.get(mode)
+        if limit is None or count <= limit:
+            return await self._readRegisters(mode, address, count, priority, labels)
+
+        registers = []
+        for offset in range(0, count, limit):
+            registers += await self._readRegisters(mode, address + offset, min(limit, count - offset), priority, labels)
+        return registers
+
+    async def _readRegisters(self, mode: ModbusMode, address: int, count: int,
+                             priority: RequestPriority = RequestPriority.NORMAL, labels: tuple = (),
+                             coalesce: bool = True) -> list[int]:
+        """Read registers, sharing the response of a covering read in flight or younger than read_max_age.
+
+        Only reads queued at the same or a higher priority are joined, so an interactive read doesn't
+        wait behind polling. Probes pass coalesce=False, they need an answer from the device itself.
+        """
+        if not coalesce:
+            return await self._sendRead(mode, address, count, priority, labels)
+
+        end = address + count
+        registers = self._recentRegisters(mode, address, end)
+        if registers is not None:
+            self.coalescedReads += 1
+            return registers
+
+        for (readMode, start, stop, readPriority), task in self._inflightReads.items():
+            if readMode == mode and start <= address and end <= stop and readPriority <= priority:
+                self.coalescedReads += 1
+                registers = await asyncio.shield(task)
+                return registers[address - start:end - start]
+
+        # The read runs on its own, so a caller giving up (e.g. a poll timing out) doesn't fail the others
+        key = (mode, address, end, priority)
+        task = asyncio.ensure_future(self._sharedRead(mode, address, count, priority, labels))
+        self._inflightReads[key] = task
+        task.add_done_callback(lambda done: self._readDone(key, done))
+        return await asyncio.shield(task)
+
+    async def _sharedRead(self, mode: ModbusMode, address: int, count: int, priority: RequestPriority, labels: tuple) -> list[int]:
+        writeCount = self._writeCount
+        registers = await self._sendRead(mode, address, count, priority, labels)
+        # A response that may predate a write isn't kept
+        if self.read_max_age > 0 and writeCount == self._writeCount:
+            self._recentReads.append((mode, address, address + count, asyncio.get_running_loop().time(), registers))
+        return registers
+
+    def _readDone(self, key: tuple, task: asyncio.Task):
+        if self._inflightReads.get(key) is task:
+            del self._inflightReads[key]
+        # Retrieve the exception, all callers may have given up waiting
+        if not task.cancelled():
+            task.exception()
+
+    def _recentRegisters(self, mode: ModbusMode, address: int, end: int) -> list[int] | None:
+        if not self._recentReads:
+            return None
+        expired = asyncio.get_running_loop().time() - self.read_max_age
+        self._recentReads = [read for read in self._recentReads if read[3] > expired]
+        for readMode, start, stop, _, registers in self._recentReads:
+            if readMode == mode and start <= address and end <= stop:
+                return registers[address - start:end - start]
+        return None
+
+    def _forgetReads(self, address: int, count: int):
+        """Called before and after a write: later reads of the range neither join reads in flight nor use recent ones."""
+        self._writeCount += 1
+        self._recentReads = [read for read in self._recentReads
+                             if read[0] != ModbusMode.HOLDING or read[2] <= address or address + count <= read[1]]
+        # Reads in flight still answer their callers
+        for key in [key for key in self._inflightReads
+                    if key[0] == ModbusMode.HOLDING and key[1] < address + count and address < key[2]]:
+            del self._inflightReads[key]
+
+    async def _sendRead(self, mode: ModbusMode, address: int, count: int,
+                        priority: RequestPriority = RequestPriority.NORMAL, labels: tuple = ()) -> list[int]:
+        if mode == ModbusMode.INPUT:
+            response = await self._execute("read_input_registers", priority, labels, address=address, count=count)
+        elif mode == ModbusMode.HOLDING:
+            response = await self._execute("read_holding_registers", priority, labels, address=address, count=count)
+        else:
+            raise ValueError(f"Unsupported Modbus mode: {mode}")
+
         # Handle Modbus errors
         if response.isError():
-            raise ModbusException(f"Error reading group {group}: {response}")
+            raise ModbusExceptionResponse(f"Error reading {count} registers from address {address}: {response}",
+                                          getattr(response, "exception_code", None))
+
+        _LOGGER.debug("Read data from address %s: %s", address, response.registers)
+        return response.registers
 
-        _LOGGER.debug("Read data from first key: %s - %s", first_key, response.registers)
+    """ ******************************************************* """
+    """ ******************* CONFIG CACHE ********************** """
+    """ ******************************************************* """
+    async def readConfig(self):
+        """Read the CONFIG group in planned blocks, unless it was read within config_cache_ttl."""
+        async with self._configLock:
+            loop = asyncio.get_running_loop()
+            if self._configReadAt is not None and loop.time() - self._configReadAt < self.config_cache_ttl:
+                return
 
-        # Process the registers and update data points
-        register_index = 0
-        for dataPointName, data in self.Datapoints[group].items():
-            registers = response.registers[register_index:register_index + data.Length]
-            register_index += data.Length
+            # Read on user request (config selection), so it goes ahead of polling
+            await self._readBlocks(self.getReadPlan([ModbusDefaultGroups.CONFIG]), RequestPriority.HIGH)
+            self._configReadAt = loop.time()
 
-            data.Value = self.process_registers(registers, data.Scaling)
+    def invalidateConfig(self):
+        self._configReadAt = None
+
+    """ ******************************************************* """
+    """ ******************** QUARANTINE *********************** """
+    """ ******************************************************* """
+    async def _quarantineIllegal(self, block: ModbusReadBlock, labels: tuple, error: ModbusExceptionResponse):
+        """Find the registers of a block the device rejects, stop reading them and read the rest."""
+        illegal = await self._findIllegal(block.mode, [point[3] for point in block.points], labels, failed=True)
+        if not illegal:
+            # Rejected as a whole but fine in parts, nothing to isolate
+            raise error
+
+        quarantine = self.quarantine.setdefault(block.mode, set())
+        for start, end in illegal:
+            quarantine.update(range(start, end))
+        _LOGGER.warning("Device rejects %s registers %s, they will no longer be read", block.mode.name,
+                        ", ".join(f"{start}-{end - 1}" if end - start > 1 else f"{start}" for start, end in illegal))
+
+        # Rejected datapoints keep their last value, driver hooks do arithmetic on them and don't expect None
+        remaining = [(group, key, datapoint) for _, group, key, datapoint in block.points
+                     if not any(start < datapoint.Address + datapoint.Length and datapoint.Address < end for start, end in illegal)]
+
+        self.invalidateReadPlans()
+        await self._readBlocks(plan_reads(remaining, max_gap=self.max_read_gap, max_count=self.max_read_registers,
+                                          excluded=self.quarantine, mode_max_count=self.block_limits))
+
+    async def _findIllegal(self, mode: ModbusMode, datapoints: list[ModbusDatapoint], labels: tuple,
+                           failed: bool = False) -> list[tuple[int, int]]:
+        """Bisect the datapoints (sorted by address) down to the [start, end) ranges that fail with an illegal address."""
+        start = datapoints[0].Address
+        end = max(datapoint.Address + datapoint.Length for datapoint in datapoints)
+        if not failed:
+            try:
+                await self._readRegisters(mode, start, end - start, labels=labels)
+                return []
+            except ModbusExceptionResponse as err:
+                if err.exception_code != ILLEGAL_DATA_ADDRESS:
+                    raise
+
+        if len(datapoints) == 1:
+            return [(start, end)]
+
+        middle = len(datapoints) // 2
+        left, right = datapoints[:middle], datapoints[middle:]
+        illegal = await self._findIllegal(mode, left, labels) + await self._findIllegal(mode, right, labels)
+        if not illegal:
+            # Both halves are fine, so the illegal registers are in the hole between them
+            hole_start = max(datapoint.Address + datapoint.Length for datapoint in left)
+            if hole_start < right[0].Address:
+                illegal = [(hole_start, right[0].Address)]
+        return illegal
+
+    """ ******************************************************* """
+    """ ****************** CHANGE TRACKING ******************** """
+    """ ******************************************************* """
+    def popChangedHandles(self) -> set[int]:
+        """Handles of all datapoints whose value or attributes changed since the last call.
+
+        Covers values set by reads and writes as well as those calculated in the driver hooks.
+        """
+        changed = set()
+        published = self._published
+        for handle, datapoint in enumerate(self._handles):
+            attrs = datapoint.Attrs
+            state = (datapoint.Value, dict(attrs) if attrs is not None else None)
+            if published[handle] != state:
+                published[handle] = state
+                changed.add(handle)
+        return changed
+
+    """ ******************************************************* """
+    """ ********************** HANDLES ************************ """
+    """ ******************************************************* """
+    def getHandle(self, group: ModbusGroup, key: str) -> int | None:
+        """Integer handle of a datapoint, for fast access through getDatapoint."""
+        datapoint = self.Datapoints.get(group, {}).get(key)
+        if datapoint is None:
+            return None
+
+        handle = self._handleIndex.get((group, key))
+        if handle is None or self._handles[handle] is not datapoint:
+            # Added or replaced by the driver after setup
+            self._updateHandles()
+            handle = self._handleIndex[(group, key)]
+        return handle
+
+    def getDatapoint(self, handle: int) -> ModbusDatapoint:
+        return self._handles[handle]
+
+    def _updateHandles(self):
+        for group, datapoints in self.Datapoints.items():
+            for key, datapoint in datapoints.items():
+                handle = self._handleIndex.get((group, key))
+                if handle is None:
+                    self._handleIndex[(group, key)] = len(self._handles)
+                    self._handles.append(datapoint)
+                    self._published.append(None)
+                elif self._handles[handle] is not datapoint:
+                    self._handles[handle] = datapoint
+                    self._published[handle] = None
 
     """ ******************************************************* """
     """ **************** READ SINGLE VALUE ******************** """
@@ -141,23 +696,10 @@ class ModbusDevice(metaclass=InitHelper):
         datapoint = self.Datapoints[group][key]
         length = datapoint.Length
 
-        try:
-            if group.mode == ModbusMode.INPUT:
-                response = await self._client.read_input_registers(address=datapoint.Address, count=length, slave=self._slave_id)
-            elif group.mode == ModbusMode.HOLDING:
-                response = await self._client.read_holding_registers(address=datapoint.Address, count=length, slave=self._slave_id)
-            else:
-                raise ValueError(f"Unsupported Modbus mode: {group.mode}")
-        except Exception as err:
-            raise
-
-        _LOGGER.debug("Read data: %s", response.registers)
-
-        if response.isError():
-            raise ModbusException(f"Error reading value for key '{key}': {response}")
-
-        registers = response.registers[:length]
-        datapoint.Value = self.process_registers(registers, datapoint.Scaling)
+        # Single values are read on user request (config selection), so they go ahead of polling
+        registers = await self._readRange(group.mode, datapoint.Address, length, RequestPriority.HIGH, (self.groupName(group),))
+        value = decode_value(registers[:length], datapoint.ValueType, datapoint.WordOrder, datapoint.ByteOrder)
+        datapoint.Value = self.scale_value(value, datapoint.Scaling)
 
         return datapoint.Value
 
@@ -171,36 +713,142 @@ class ModbusDevice(metaclass=InitHelper):
             raise KeyError(f"Key '{key}' not found in group '{group}'")
 
         datapoint = self.Datapoints[group][key]
-        length = datapoint.Length
-        if length > 2:
-            raise ValueError(f"Unsupported register length: {length}. Only 1 or 2 registers are supported.")
 
-        # Scale the value
-        scaled_value = round(value / datapoint.Scaling)
-        if scaled_value < 0:
-            scaled_value = self.twos_complement(scaled_value, bits=16 * length)
-
-        # Prepare the registers
-        registers = []
-        for _ in range(length):
-            registers.insert(0, scaled_value & 0xFFFF)  # Extract the least significant 16 bits
-            scaled_value >>= 16  # Shift the value to the next 16 bits
+        # Scale and encode the value
+        raw_value = value if isinstance(value, str) else value / datapoint.Scaling
+        registers = encode_value(raw_value, datapoint.ValueType, datapoint.Length, datapoint.WordOrder, datapoint.ByteOrder)
 
         # Write the registers
+        if self.coalesce_writes:
+            await self._queueWrite(datapoint.Address, registers)
+        else:
+            await self._writeRegisters(datapoint.Address, registers)
+
+        # Update the cached value, other config values may depend on the one written
+        datapoint.Value = value
+        if group == ModbusDefaultGroups.CONFIG:
+            self.invalidateConfig()
+        _LOGGER.debug("Successfully wrote value for key '%s': %s", key, value)
+
+    async def _writeRegisters(self, address: int, registers: list[int]):
+        self._forgetReads(address, len(registers))
+        if len(registers) == 1:
+            response = await self._execute("write_register", RequestPriority.HIGH, ("WRITE",), address=address, value=registers[0])
+        else:
+            response = await self._execute("write_registers", RequestPriority.HIGH, ("WRITE",), address=address, values=registers)
+        self._forgetReads(address, len(registers))
+
+        if response.isError():
+            raise ModbusException(f"Failed to write {len(registers)} registers at address {address}: {response}")
+
+    """ ******************************************************* """
+    """ ****************** WRITE COALESCING ******************* """
+    """ ******************************************************* """
+    async def _queueWrite(self, address: int, registers: list[int]):
+        """Add a write to the pending batch and wait until the batch has been sent.
+
+        A write to an idle device is sent right away, writes arriving while it is in flight form the next batch.
+        """
+        for i, register in enumerate(registers):
+            self._pendingWrites[address + i] = register
+
+        future = asyncio.get_running_loop().create_future()
+        self._pendingWriters.append((address, len(registers), future))
+        if self._flushTask is None:
+            self._flushTask = asyncio.create_task(self._flushWrites())
+        await future
+
+    async def _flushWrites(self):
         try:
-            if length == 1:
-                response = await self._client.write_register(address=datapoint.Address, value=registers[0], slave=self._slave_id)
+            while self._pendingWriters:
+                # Take the batch, writes arriving from now on start a new one
+                pending, writers = self._pendingWrites, self._pendingWriters
+                self._pendingWrites, self._pendingWriters = {}, []
+                try:
+                    await self._sendWrites(pending, writers)
+                finally:
+                    for _, _, future in writers:
+                        if not future.done():
+                            future.set_exception(ModbusException("Device closed before pending writes were sent"))
+        finally:
+            self._flushTask = None
+
+    async def _sendWrites(self, pending: Dict[int, int], writers: list[tuple[int, int, asyncio.Future]]):
+        # Merge adjacent registers into runs of at most MAX_WRITE_REGISTERS
+        runs = []
+        for address in sorted(pending):
+            if runs and address == runs[-1][0] + len(runs[-1][1]) and len(runs[-1][1]) < MAX_WRITE_REGISTERS:
+                runs[-1][1].append(pending[address])
             else:
-                response = await self._client.write_registers(address=datapoint.Address, values=registers, slave=self._slave_id)
-        except Exception as err:
-            raise
+                runs.append((address, [pending[address]]))
+        _LOGGER.debug("Writing %s coalesced registers in %s requests", len(pending), len(runs))
 
+        errors = []
+        for address, registers in runs:
+            try:
+                await self._writeRegisters(address, registers)
+            except Exception as err:
+                errors.append((address, address + len(registers), err))
+
+        # Each writer gets the error of the first failed request covering its registers
+        for address, length, future in writers:
+            if future.done():
+                continue
+            error = next((err for start, end, err in errors if start < address + length and address < end), None)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    """ ******************************************************* """
+    """ ***************** RAW REGISTER ACCESS ***************** """
+    """ ******************************************************* """
+    async def readRaw(self, registerType: str, address: int, count: int) -> list:
+        """Read count registers (or bits) in one request, whether or not the driver defines datapoints there."""
+        if registerType not in RAW_READ_METHODS:
+            raise ValueError(f"Unknown register type: {registerType}")
+        method, limit = RAW_READ_METHODS[registerType]
+        if not 1 <= count <= limit:
+            raise ValueError(f"Can read 1 to {limit} {registerType} values per request, not {count}")
+
+        response = await self._execute(method, RequestPriority.HIGH, ("RAW",), address=address, count=count)
+        if response.isError():
+            raise ModbusExceptionResponse(f"Error reading {count} {registerType} values from address {address}: {response}",
+                                          getattr(response, "exception_code", None))
+
+        if method in ("read_coils", "read_discrete_inputs"):
+            # Bits are padded to whole bytes
+            return [bool(bit) for bit in response.bits[:count]]
+        return list(response.registers)
+
+    async def writeRaw(self, registerType: str, address: int, values: list):
+        """Write registers (or coils) in one request, bypassing datapoints and write coalescing."""
+        if registerType not in RAW_WRITE_METHODS:
+            raise ValueError(f"Can't write register type: {registerType}")
+        single, multiple, limit = RAW_WRITE_METHODS[registerType]
+        if not 1 <= len(values) <= limit:
+            raise ValueError(f"Can write 1 to {limit} {registerType} values per request, not {len(values)}")
+
+        if registerType == "coil":
+            if any(not isinstance(value, bool) for value in values):
+                raise ValueError("Coil values must be true or false")
+        elif any(not isinstance(value, int) or not 0 <= value <= 0xFFFF for value in values):
+            raise ValueError("Register values must be integers between 0 and 65535")
+
+        if registerType == "holding":
+            self._forgetReads(address, len(values))
+        if len(values) == 1:
+            response = await self._execute(single, RequestPriority.HIGH, ("RAW",), address=address, value=values[0])
+        else:
+            response = await self._execute(multiple, RequestPriority.HIGH, ("RAW",), address=address, values=values)
+        if registerType == "holding":
+            self._forgetReads(address, len(values))
         if response.isError():
-            raise ModbusException(f"Failed to write value for key '{key}': {response}")
+            raise ModbusExceptionResponse(f"Failed to write {len(values)} {registerType} values at address {address}: {response}",
+                                          getattr(response, "exception_code", None))
 
-        # Update the cached value
-        datapoint.Value = value
-        _LOGGER.debug("Successfully wrote value for key '%s': %s", key, value)
+        # May have changed configuration behind the datapoints' back
+        self.invalidateConfig()
 
     """ ******************************************************* """
     """ *********** HELPER FOR PROCESSING REGISTERS *********** """
@@ -215,22 +863,12 @@ class ModbusDevice(metaclass=InitHelper):
         
         return number  # Return the number as is if it's already non-negative.
 
-    def process_registers(self, registers: list[int], scaling: float) -> float | str:
-        length = len(registers)
-
-        if length <= 2:
-            # Combine registers into a single value (big-endian)
-            combined_value = 0
-            for reg in registers:
-                combined_value = (combined_value << 16) | reg
+    def scale_value(self, value, scaling: float):
+        if value is None or isinstance(value, str) or scaling == 1.0:
+            return value
+        return value * scaling
 
-            newVal = self.twos_complement(combined_value)
-            return newVal if scaling == 1.0 else newVal * scaling
-        else:
-            # Assume this is a text string
-            try:
-                newVal = ''.join(chr(value) for value in registers)
-                return newVal.rstrip('\x00')
-            except ValueError as e:
-                # Failed to decode text, most likely just registers we are ignoring
-                return None
\ No newline at end of file
+    def process_registers(self, registers: list[int], scaling: float) -> float | str:
+        """Decode registers with the type implied by their count (int16, int32 or text)."""
+        datapoint = ModbusDatapoint(Length=len(registers))
+        return self.scale_value(decode_value(registers, datapoint.ValueType), scaling)
@@ -0,0 +1,76 @@
+import logging
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .codec import ModbusBlockCodec, compile_codec, datapoint_field
+from .datatypes import ModbusMode, ModbusGroup, ModbusDatapoint
+
+_LOGGER = logging.getLogger(__name__)
+
+# Protocol limit for FC3/FC4 (Modbus Application Protocol v1.1b3, 6.3/6.4)
+MAX_READ_REGISTERS: int = 125
+
+@dataclass
+class ModbusReadBlock:
+    """One read request covering one or more datapoints of the same register type."""
+    mode: ModbusMode
+    address: int
+    count: int
+    # (register offset in the response, group, key, datapoint)
+    points: List[Tuple[int, ModbusGroup, str, ModbusDatapoint]] = field(default_factory=list)
+    # Decodes a response into one value per point
+    codec: ModbusBlockCodec = None
+
+    @property
+    def end(self) -> int:
+        return self.address + self.count
+
+def _excluded_between(excluded: List[int], start: int, end: int) -> bool:
+    """True if any of the sorted excluded addresses is in [start, end)."""
+    i = bisect_left(excluded, start)
+    return i < len(excluded) and excluded[i] < end
+
+def plan_reads(datapoints: Iterable[Tuple[ModbusGroup, str, ModbusDatapoint]], max_gap: int = 0,
+               max_count: int = MAX_READ_REGISTERS, excluded: Dict[ModbusMode, Set[int]] | None = None,
+               mode_max_count: Dict[ModbusMode, int] | None = None) -> List[ModbusReadBlock]:
+    """Build a minimal set of read requests for the given datapoints.
+
+    Datapoints of the same mode are merged into one request as long as the hole
+    between them is at most max_gap registers and the request stays within max_count.
+    Excluded addresses (registers the device rejects) are never read: datapoints covering
+    them are left out, and holes containing them are not bridged. mode_max_count lowers
+    max_count for single register types.
+    """
+    by_mode = {}
+    for group, key, datapoint in datapoints:
+        if group.mode == ModbusMode.NONE or datapoint.Length <= 0:
+            continue
+        by_mode.setdefault(group.mode, []).append((group, key, datapoint))
+
+    blocks = []
+    for mode, points in by_mode.items():
+        points.sort(key=lambda point: point[2].Address)
+        blocked = sorted(excluded.get(mode, ())) if excluded else []
+        limit = min(max_count, mode_max_count.get(mode, max_count)) if mode_max_count else max_count
+
+        block = None
+        for group, key, datapoint in points:
+            start = datapoint.Address
+            end = start + datapoint.Length
+            if blocked and _excluded_between(blocked, start, end):
+                continue
+            if (block is None or start - block.end > max_gap or max(end, block.end) - block.address > limit
+                    or (blocked and _excluded_between(blocked, block.end, start))):
+                block = ModbusReadBlock(mode, start, datapoint.Length)
+                blocks.append(block)
+            else:
+                block.count = max(end, block.end) - block.address
+            block.points.append((start - block.address, group, key, datapoint))
+
+    for block in blocks:
+        block.codec = compile_codec(block.count, tuple(datapoint_field(offset, datapoint) for offset, _, _, datapoint in block.points))
+
+    _LOGGER.debug("Planned %s read requests: %s", len(blocks), [(b.mode, b.address, b.count) for b in blocks])
+    return blocks
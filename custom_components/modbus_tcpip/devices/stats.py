@@ -0,0 +1,112 @@
+import logging
+
+from bisect import bisect_left
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, anything slower lands in a final overflow bucket
+LATENCY_BUCKETS_MS: tuple = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class ModbusRequestStats:
+    """Counters and a latency histogram for a stream of Modbus requests.
+
+    Recording is a handful of integer updates so it can stay on the hot path. Percentiles are
+    estimated from the histogram as the upper bound of the bucket they fall in, capped at the maximum.
+    """
+
+    __slots__ = ("requests", "registers", "errors", "timeouts", "retries", "exception_codes",
+                 "histogram", "latency_sum", "latency_max", "last_latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.registers = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.exception_codes: dict[int, int] = {}
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.last_latency = None
+
+    def record(self, latency: float, registers: int, retry: bool = False,
+               exception_code: int | None = None, timeout: bool = False, error: bool = False):
+        """Record one request, latency in seconds."""
+        latency_ms = latency * 1000
+        self.requests += 1
+        self.registers += registers
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.latency_sum += latency_ms
+        self.last_latency = latency_ms
+        if latency_ms > self.latency_max:
+            self.latency_max = latency_ms
+        if retry:
+            self.retries += 1
+        if timeout:
+            self.timeouts += 1
+        if exception_code is not None:
+            self.exception_codes[exception_code] = self.exception_codes.get(exception_code, 0) + 1
+        if error or timeout or exception_code is not None:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> float | None:
+        """Latency in ms below which pct percent of the requests completed."""
+        if self.requests == 0:
+            return None
+        rank = pct / 100 * self.requests
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and count and i < len(LATENCY_BUCKETS_MS):
+                return min(LATENCY_BUCKETS_MS[i], round(self.latency_max, 1))
+        return round(self.latency_max, 1)
+
+    @property
+    def latency_avg(self) -> float | None:
+        return round(self.latency_sum / self.requests, 1) if self.requests else None
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "registers": self.registers,
+            "payload_bytes": self.registers * 2,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "exception_codes": dict(self.exception_codes),
+            "latency_ms": {
+                "avg": self.latency_avg,
+                "p50": self.percentile(50),
+                "p99": self.percentile(99),
+                "max": round(self.latency_max, 1),
+                "last": None if self.last_latency is None else round(self.last_latency, 1),
+                "histogram": {f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)} |
+                             {f">{LATENCY_BUCKETS_MS[-1]}": self.histogram[-1]},
+            },
+        }
+
+class ModbusDeviceStats:
+    """Request statistics of one device, in total and per group (or operation) label."""
+
+    def __init__(self):
+        self.total = ModbusRequestStats()
+        self.groups: dict[str, ModbusRequestStats] = {}
+
+    def record(self, labels: tuple, latency: float, registers: int, **kwargs):
+        """Record a request in the total and in every label it served."""
+        self.total.record(latency, registers, **kwargs)
+        for label in labels:
+            stats = self.groups.get(label)
+            if stats is None:
+                stats = self.groups[label] = ModbusRequestStats()
+            stats.record(latency, registers, **kwargs)
+
+    def reset(self):
+        self.total = ModbusRequestStats()
+        self.groups.clear()
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total.as_dict(),
+            "groups": {label: stats.as_dict() for label, stats in sorted(self.groups.items())},
+        }
@@ -0,0 +1,58 @@
+"""Diagnostics support for Modbus TCP/IP."""
+import logging
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_IP, CONF_SERIAL_PORT
+from .coordinator import ModbusCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Host and serial port identify the installation, the rest of the entry is needed to reproduce issues
+TO_REDACT = {CONF_IP, CONF_SERIAL_PORT}
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry, including the request statistics of the device."""
+    coordinator:ModbusCoordinator = hass.data[DOMAIN][entry.entry_id]
+    device = coordinator._modbusDevice
+    connection = device._connection
+
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "device": {
+            "manufacturer": device.manufacturer,
+            "model": device.model,
+            "sw_version": device.sw_version,
+            "serial_number": REDACTED if device.serial_number else None,
+        },
+        "connection": {
+            # Transport type and port or baud rate, without the host or serial port
+            "key": [connection.key[0], REDACTED, *connection.key[2:]] if connection is not None else None,
+            "state": connection.state.value if connection is not None else None,
+            "reconnects": connection.reconnects if connection is not None else None,
+            "max_inflight_requests": device.max_inflight_requests,
+        },
+        "health": {
+            "srtt_ms": round(device.rtt.srtt * 1000, 1) if device.rtt.srtt is not None else None,
+            "request_timeout_s": round(device.rtt.timeout, 3),
+            "breaker_state": device.breaker.state.value,
+            "breaker_trips": device.breaker.trips,
+        },
+        "polling": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "overruns": coordinator.poll_overruns,
+            "device_info_updates_skipped": coordinator.device_info_updates_skipped,
+            "block_limits": {mode.name: limit for mode, limit in device.block_limits.items()},
+            "coalesced_reads": device.coalescedReads,
+            "quarantine": {mode.name: sorted(addresses) for mode, addresses in device.quarantine.items()},
+            "read_plan": [
+                {"mode": block.mode.name, "address": block.address, "count": block.count,
+                 "groups": sorted({device.groupName(point[1]) for point in block.points})}
+                for block in device.getReadPlan(device.getPollGroups(firstRead=False))
+            ],
+        },
+        "requests": device.stats.as_dict(),
+    }
@@ -11,8 +11,9 @@ class ModbusBaseEntity(CoordinatorEntity):
     """Modbus base entity class."""
 
     def __init__(self, coordinator, group:ModbusGroup, key:str, modbusDataPoint:ModbusDatapoint):
-        """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator)
+        """Pass coordinator to CoordinatorEntity, only updated when this datapoint changes."""
+        handle = coordinator.get_handle(group, key)
+        super().__init__(coordinator, context=handle)
 
         """Generic Entity properties"""
         self._attr_entity_category = modbusDataPoint.DataType.category
@@ -27,13 +28,22 @@ class ModbusBaseEntity(CoordinatorEntity):
         """Store this entities keys."""
         self._group = group
         self._key = key
+        self._handle = handle
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.coordinator.registerEntity(self.entity_id, self._group)
+
+    async def async_will_remove_from_hass(self) -> None:
+        self.coordinator.unregisterEntity(self.entity_id)
+        await super().async_will_remove_from_hass()
 
     @property
     def extra_state_attributes(self):
         """Return entity specific state attributes."""
         attrs = {}
 
-        new_attrs = self.coordinator.get_attrs(self._group, self._key)
+        new_attrs = self.coordinator.get_attrs_by_handle(self._handle)
         if new_attrs is not None:
             attrs.update(new_attrs)
         return attrs
\ No newline at end of file
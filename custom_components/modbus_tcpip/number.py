@@ -64,12 +64,13 @@ class ModbusNumberEntity(ModbusBaseEntity, NumberEntity):
 
         self._group = newGroup
         self._key = newKey
+        self._handle = self.coordinator.get_handle(newGroup, newKey)
         self.async_schedule_update_ha_state(force_refresh=False)
 
     @property
     def native_value(self) -> float | None:
         """Return number value."""
-        val = self.coordinator.get_value(self._group, self._key)
+        val = self.coordinator.get_value_by_handle(self._handle)
         return val
 
     async def async_set_native_value(self, value):
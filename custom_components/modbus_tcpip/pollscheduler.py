@@ -0,0 +1,76 @@
+import logging
+import time
+
+from .devices.datatypes import ModbusGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+# A refresh may fire slightly before a due time, treat groups this close as due
+DUE_TOLERANCE: float = 1.0  # Seconds
+MIN_DELAY: float = 1.0  # Seconds
+
+# Devices sharing a gateway or bus start one after the other, and poll spread over the interval
+FIRST_REFRESH_STAGGER: float = 0.2  # Seconds per device
+GOLDEN_RATIO_CONJUGATE: float = 0.6180339887498949
+
+def poll_phase(index: int) -> float:
+    """Offset into the poll intervals for the index-th device on an endpoint, as a fraction of the interval.
+
+    Golden ratio steps keep the offsets evenly spread for any number of devices, without
+    moving existing ones when another device is added.
+    """
+    return (index * GOLDEN_RATIO_CONJUGATE) % 1.0
+
+class ModbusPollScheduler:
+    """Fixed rate schedule for polled groups with individual intervals.
+
+    Each group is due at a fixed multiple of its interval from the start, so slow reads don't make
+    the schedule drift. If a group misses a whole interval the overrun is logged and counted,
+    and the missed reads are skipped instead of fired back to back, keeping the group on its schedule (and phase).
+    """
+
+    def __init__(self, groups: list[ModbusGroup], default_interval: float):
+        self._default_interval = default_interval
+        self._intervals = {group: (group.interval or default_interval) for group in groups}
+        self._next_due = {}
+        self.overruns = 0
+        self.start()
+
+    @property
+    def groups(self) -> list[ModbusGroup]:
+        return list(self._intervals)
+
+    def start(self, now: float | None = None, phase: float = 0.0):
+        """(Re)start the schedule, groups are due phase intervals from now and every interval after that.
+
+        Without a phase they are due one interval from now.
+        """
+        now = time.monotonic() if now is None else now
+        self._next_due = {group: now + interval * (phase or 1.0) for group, interval in self._intervals.items()}
+
+    def due_groups(self, now: float | None = None) -> list[ModbusGroup]:
+        """Groups that should be read now. Their next due time is advanced by one interval."""
+        now = time.monotonic() if now is None else now
+
+        due = []
+        for group, interval in self._intervals.items():
+            next_due = self._next_due[group]
+            if next_due - now > DUE_TOLERANCE:
+                continue
+
+            due.append(group)
+            next_due += interval
+            if next_due <= now:
+                missed = int((now - next_due) // interval) + 1
+                self.overruns += missed
+                _LOGGER.warning("Polling of group %s is %.1f seconds behind schedule, skipping %s read(s)",
+                                group, now - self._next_due[group], missed)
+                next_due += missed * interval
+            self._next_due[group] = next_due
+        return due
+
+    def time_to_next_due(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        if not self._next_due:
+            return self._default_interval
+        return max(MIN_DELAY, min(self._next_due.values()) - now)
@@ -45,7 +45,7 @@ class ModbusSelectEntity(ModbusBaseEntity, SelectEntity):
                 optionIndex = self.coordinator.config_selection
                 option = self._options[optionIndex]
             else:
-                optionIndex = self.coordinator.get_value(self._group, self._key)
+                optionIndex = self.coordinator.get_value_by_handle(self._handle)
                 option = self._options[optionIndex]
         except Exception as e:
             option = "Unknown"
@@ -1,6 +1,9 @@
 import logging
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import UnitOfTime
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import ModbusCoordinator
@@ -10,6 +13,16 @@ from .devices.datatypes import ModbusGroup, ModbusDefaultGroups, ModbusDatapoint
 
 _LOGGER = logging.getLogger(__name__)
 
+# Diagnostic sensors on the request statistics of the device: name -> (value from ModbusRequestStats, unit)
+STATS_SENSORS = {
+    "Request Latency p50": (lambda stats: stats.percentile(50), UnitOfTime.MILLISECONDS),
+    "Request Latency p99": (lambda stats: stats.percentile(99), UnitOfTime.MILLISECONDS),
+    "Requests": (lambda stats: stats.requests, None),
+    "Request Errors": (lambda stats: stats.errors, None),
+    "Request Timeouts": (lambda stats: stats.timeouts, None),
+    "Request Retries": (lambda stats: stats.retries, None),
+}
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Setup sensor from a config entry created in the integrations UI."""
     # Find coordinator for this device
@@ -23,6 +36,10 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                 if isinstance(datapoint.DataType, ModbusSensorData):
                     ha_entities.append(ModbusSensorEntity(coordinator, group, key, datapoint))
 
+    # Request statistics, disabled until the user enables them
+    for key, (value_fn, unit) in STATS_SENSORS.items():
+        ha_entities.append(ModbusStatsSensorEntity(coordinator, key, value_fn, unit))
+
     async_add_entities(ha_entities, False)
 
 class ModbusSensorEntity(ModbusBaseEntity, SensorEntity):
@@ -39,5 +56,33 @@ class ModbusSensorEntity(ModbusBaseEntity, SensorEntity):
     @property
     def native_value(self):
         """Return the value of the sensor."""
-        val = self.coordinator.get_value(self._group, self._key)
+        val = self.coordinator.get_value_by_handle(self._handle)
         return val
+
+
+class ModbusStatsSensorEntity(CoordinatorEntity, SensorEntity):
+    """Request statistics of the device, with the per group breakdown as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, key:str, value_fn, unit):
+        """Updated after every poll, not tied to a datapoint."""
+        super().__init__(coordinator)
+
+        self._attr_name = "{} {}".format(self.coordinator.devicename, key)
+        self._attr_unique_id = "{}-{}".format(self.coordinator.device_id, self.name)
+        self._attr_device_info = {
+            "identifiers": self.coordinator.identifiers,
+        }
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = SensorStateClass.MEASUREMENT if unit is not None else SensorStateClass.TOTAL_INCREASING
+        self._value_fn = value_fn
+
+    @property
+    def native_value(self):
+        return self._value_fn(self.coordinator.stats.total)
+
+    @property
+    def extra_state_attributes(self):
+        return {label: self._value_fn(stats) for label, stats in self.coordinator.stats.groups.items()}
@@ -35,7 +35,7 @@ class ModbusSwitchEntity(ModbusBaseEntity, SwitchEntity):
     @property
     def is_on(self):
         """Return the state of the switch."""
-        return self.coordinator.get_value(self._group, self._key)
+        return self.coordinator.get_value_by_handle(self._handle)
 
     async def async_turn_on(self, **kwargs):
         await self.writeValue(1)